@@ -23,26 +23,29 @@
 #
 import argparse
 
+import json
 import sys
-from bakerman.handler import discoverRepoHandler
-from bakerman.handler import discoverRenderHandler
-from bakerman.handler import discoverManifestHandler
-from bakerman.handler import discoverLookupHandler
-from bakerman.helper import lookupVariables
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from bakerman.errors import LookupFailed
 from bakerman.helper import getLogger
 
+# Everything not required to parse the CLI arguments is imported on first
+# use to keep the startup time of the CLI low.
+if TYPE_CHECKING:
+    from bakerman.cache import Skeleton as CacheSkeleton
+
 COMMIT_MESSAGE = """
 Bakerman committed following changes:
 %s
 """
 
 
-def parseArguments() -> argparse.Namespace:
+def buildParser() -> argparse.ArgumentParser:
     """
-    Defines and parses the CLI provided arguments.
+    Defines the CLI arguments of a single Bakerman run.
 
     Returns:
-        - NameSpace object containing all arguments
+        The `argparse.ArgumentParser` instance.
     """
 
     parser = argparse.ArgumentParser(
@@ -74,8 +77,8 @@ def parseArguments() -> argparse.Namespace:
         "--workdir",
         type=str,
         dest="workdir",
-        required=True,
-        help="The local workdir containing the repository",
+        default=None,
+        help="The local workdir containing the repository. Required unless --repos-file is defined.",
     )
     parser.add_argument(
         "--target",
@@ -84,6 +87,15 @@ def parseArguments() -> argparse.Namespace:
         default="bakerman.target",
         help="The path of the target build file which --template will render into.",
     )
+    parser.add_argument(
+        "--render",
+        type=str,
+        dest="render",
+        action="append",
+        metavar="TEMPLATE=TARGET",
+        default=None,
+        help="A template and the target file it renders into. Can be defined multiple times to render multiple targets using the same manifest. Replaces --template and --target.",
+    )
     parser.add_argument(
         "--no-repo",
         dest="no_repo",
@@ -91,82 +103,684 @@ def parseArguments() -> argparse.Namespace:
         action="store_true",
         help="If defined, no repo commit & push is done.",
     )
+    parser.add_argument(
+        "--clone-depth",
+        type=int,
+        dest="clone_depth",
+        default=None,
+        help="Create a shallow clone truncated to this number of commits.",
+    )
+    parser.add_argument(
+        "--clone-filter",
+        type=str,
+        dest="clone_filter",
+        default=None,
+        help="Create a partial clone using this object filter. Use 'blob:none' to only download the file contents which are checked out.",
+    )
+    parser.add_argument(
+        "--sparse",
+        dest="sparse",
+        default=False,
+        action="store_true",
+        help="Only check out --manifest, --template and --target when cloning.",
+    )
+    parser.add_argument(
+        "--bare",
+        dest="bare",
+        default=False,
+        action="store_true",
+        help="Create a bare clone without a working tree. Only --manifest, --template and --target are extracted and changes are committed using git plumbing.",
+    )
+    parser.add_argument(
+        "--refresh",
+        dest="refresh",
+        default=False,
+        action="store_true",
+        help="Fetch and fast-forward the repository when --workdir already contains it.",
+    )
+    parser.add_argument(
+        "--reference-dir",
+        type=str,
+        dest="reference_dir",
+        default=None,
+        help="Keep a bare mirror of each repository in this directory and clone using it as reference so all workdirs of a repository share its objects.",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        dest="fingerprint",
+        default=False,
+        action="store_true",
+        help="Record a fingerprint of each run next to --workdir and skip the run when neither the upstream repository nor the lookup results have changed since.",
+    )
+    parser.add_argument(
+        "--repos-file",
+        type=str,
+        dest="repos_file",
+        default=None,
+        help="A JSON file containing a list of repository definitions to process in parallel. Each definition uses the keys of the CLI arguments (repo, workdir, manifest, template, target, no_repo).",
+    )
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        dest="batch_workers",
+        default=8,
+        help="The maximum number of repositories of --repos-file processed at the same time.",
+    )
+    parser.add_argument(
+        "--summary-file",
+        type=str,
+        dest="summary_file",
+        default=None,
+        help="Write the --repos-file results as JSON to this file.",
+    )
+    addGlobalArguments(parser)
 
-    return parser.parse_args()
+    return parser
 
 
-def start(args: argparse.Namespace) -> None:
+def addGlobalArguments(parser: argparse.ArgumentParser) -> None:
     """
-    Main Bakerman logic.
-    Performs
+    Defines the CLI arguments shared by all repositories processed by a single
+    Bakerman process.
 
-    Raises:
-        Exception: An unhandled error happened and should be made clear to the
-        user as this indicates a bug for which a report should be made.
+    Args:
+        parser: The `argparse.ArgumentParser` to add the arguments to.
     """
 
-    logger = getLogger("main")
-    commit_message = []
-    try:
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        dest="log_level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="The minimum level of the log messages to write.",
+    )
+    parser.add_argument(
+        "--log-queue",
+        dest="log_queue",
+        default=False,
+        action="store_true",
+        help="Write log messages from a background thread so logging doesn't block the lookup and repository workers.",
+    )
+    parser.add_argument(
+        "--lookup-workers",
+        type=int,
+        dest="lookup_workers",
+        default=8,
+        help="The maximum number of lookups executed concurrently.",
+    )
+    parser.add_argument(
+        "--cache-backend",
+        type=str,
+        dest="cache_backend",
+        default=None,
+        choices=["json", "sqlite"],
+        help="The backend storing lookup results between runs. If omitted no lookup results are cached.",
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=str,
+        dest="cache_file",
+        default="/var/tmp/bakerman/lookup.cache",
+        help="The file in which --cache-backend stores the lookup results.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=str,
+        dest="cache_ttl",
+        default=[],
+        action="append",
+        metavar="TYPE=SECONDS",
+        help="The number of seconds lookup results of TYPE are cached. Can be defined multiple times.",
+    )
+    parser.add_argument(
+        "--http-pool-size",
+        type=int,
+        dest="http_pool_size",
+        default=10,
+        help="The number of HTTP connections kept alive per host.",
+    )
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        dest="http_retries",
+        default=3,
+        help="The number of times a failed HTTP request is retried.",
+    )
+    parser.add_argument(
+        "--http-timeout",
+        type=float,
+        dest="http_timeout",
+        default=30,
+        help="The default timeout in seconds of HTTP requests.",
+    )
+    parser.add_argument(
+        "--alpine-source",
+        type=str,
+        dest="alpine_source",
+        default="web",
+        choices=["web", "index"],
+        help="Lookup Alpine packages by scraping pkgs.alpinelinux.org or from the downloaded APKINDEX.",
+    )
+    parser.add_argument(
+        "--alpine-index-dir",
+        type=str,
+        dest="alpine_index_dir",
+        default="/var/tmp/bakerman/apkindex",
+        help="The directory in which the parsed APKINDEX files are stored.",
+    )
+    parser.add_argument(
+        "--template-bytecode-cache",
+        type=str,
+        dest="template_bytecode_cache",
+        default=None,
+        help="Store compiled Jinja2 templates in this directory so they are only compiled once across runs.",
+    )
+    parser.add_argument(
+        "--stream-render",
+        dest="stream_render",
+        default=False,
+        action="store_true",
+        help="Write rendered templates in chunks while rendering instead of rendering them into memory first. Keeps the memory usage flat for large targets.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        dest="metrics_file",
+        default=None,
+        help="Write a JSON summary of the phase timings and counters to this file at the end of the run.",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=str,
+        dest="metrics_textfile",
+        default=None,
+        help="Write the phase timings and counters in the Prometheus text format to this file at the end of the run.",
+    )
+
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    """
+    Defines and parses the CLI provided arguments.
+
+    Args:
+        argv: The arguments to parse. Defaults to `sys.argv`.
+
+    Returns:
+        - NameSpace object containing all arguments
+    """
+
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    if args.workdir is None and args.repos_file is None:
+        parser.error("one of the arguments --workdir --repos-file is required")
+    return args
+
+
+def loadRepoArguments(
+    filename: str, args: argparse.Namespace
+) -> List[argparse.Namespace]:
+    """
+    Reads a JSON file containing a list of repository definitions and returns
+    the arguments of a Bakerman run for each of them.  Each definition is an
+    object using the same keys as the CLI argument destinations such as
+    `repo`, `workdir`, `manifest`, `template` and `target`.  The values of
+    `args`, except `repo` and `workdir`, are the defaults of each definition.
+
+    Args:
+        filename: The JSON file containing the repository definitions.
+        args: The CLI arguments applied to each repository.
+
+    Returns:
+        A list of NameSpace objects, one for each repository.
+    """
+
+    with open(filename) as f:
+        definitions = json.load(f)
+
+    repos = []
+    for definition in definitions:
+        if "workdir" not in definition:
+            raise NotImplementedError(
+                "Repository definition %s in %s has no 'workdir'."
+                % (definition, filename)
+            )
+        repo_args = parseArguments(["--workdir", definition["workdir"]])
+        for key in vars(repo_args):
+            if key not in ("repo", "workdir") and hasattr(args, key):
+                setattr(repo_args, key, getattr(args, key))
+        for key, value in definition.items():
+            setattr(repo_args, key, value)
+        repos.append(repo_args)
+    return repos
+
+
+def configure(args: argparse.Namespace) -> None:
+    """
+    Applies the process wide settings defined by `addGlobalArguments`.
+
+    Args:
+        args: The parsed CLI arguments.
+    """
+
+    from bakerman import httpclient
+    from bakerman.helper import setupLogging
+    from bakerman.plugin.lookup import alpine_package
+    from bakerman.plugin.render import jinja2
+
+    setupLogging(args.log_level, args.log_queue)
+    httpclient.configure(
+        pool_size=args.http_pool_size,
+        retries=args.http_retries,
+        timeout=args.http_timeout,
+    )
+    alpine_package.configure(source=args.alpine_source, index_dir=args.alpine_index_dir)
+    jinja2.configure(
+        bytecode_cache=args.template_bytecode_cache, stream=args.stream_render
+    )
+
+
+def exportMetrics(args: argparse.Namespace) -> None:
+    """
+    Writes the recorded metrics to `--metrics-file` and `--metrics-textfile`.
+
+    Args:
+        args: The parsed CLI arguments.
+    """
+
+    if args.metrics_file or args.metrics_textfile:
+        from bakerman import metrics
+
+        metrics.export(args.metrics_file, args.metrics_textfile)
+
+
+def createCache(args: argparse.Namespace) -> Optional["CacheSkeleton"]:
+    """
+    Returns the lookup result cache defined by the CLI arguments.
+
+    Args:
+        args: The parsed CLI arguments.
+
+    Returns:
+        A `bakerman.cache.Skeleton` instance or `None` when caching is disabled.
+    """
+
+    if args.cache_backend:
+        from bakerman.cache import getCache
+
+        return getCache(
+            args.cache_backend, args.cache_file, parseCacheTTL(args.cache_ttl)
+        )
+    else:
+        return None
+
+
+def parseCacheTTL(values: List[str]) -> Dict[str, int]:
+    """
+    Converts the `--cache-ttl` values into a dictionary.
+
+    Args:
+        values: A list of `TYPE=SECONDS` strings.
+
+    Returns:
+        A dictionary mapping each lookup type to its TTL.
+    """
+
+    ttls = {}
+    for value in values:
+        lookup_type, _, seconds = value.partition("=")
+        ttls[lookup_type] = int(seconds)
+    return ttls
+
+
+def renderPairs(args: argparse.Namespace) -> List[Tuple[str, str]]:
+    """
+    Returns the template and target file pairs to render.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+
+    Returns:
+        A list of (template, target) tuples.
+    """
+
+    if not args.render:
+        return [(args.template, args.target)]
+
+    pairs = []
+    for value in args.render:
+        template, separator, target = value.partition("=")
+        if not separator or not template or not target:
+            raise NotImplementedError(
+                "Invalid --render value '%s'. Expected TEMPLATE=TARGET." % (value)
+            )
+        pairs.append((template, target))
+    return pairs
+
+
+def repoPaths(args: argparse.Namespace) -> List[str]:
+    """
+    Returns the paths of all files Bakerman reads and writes in a repository.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+    """
+
+    paths = [args.manifest]
+    for template, target in renderPairs(args):
+        paths += [template, target]
+    return list(dict.fromkeys(paths))
+
+
+def repoOptions(args: argparse.Namespace) -> Dict:
+    """
+    Returns the options passed to the repository plugin.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+
+    Returns:
+        A dictionary of keyword arguments.
+    """
+
+    return {
+        "depth": args.clone_depth,
+        "filter": args.clone_filter,
+        "paths": repoPaths(args),
+        "sparse": args.sparse,
+        "bare": args.bare,
+        "refresh": args.refresh,
+        "reference_dir": args.reference_dir,
+    }
+
+
+class Job:
+    """
+    The state of a Bakerman run for a single repository.
+
+    Instantiating a `Job` discovers the required plugins, makes sure the
+    repository is available in `--workdir` and reads the manifest.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        from bakerman.handler import discoverRepoHandler
+        from bakerman.handler import discoverRenderHandler
+        from bakerman.handler import discoverManifestHandler
+        from bakerman import metrics
+
+        self.args = args
+        self.name = args.repo or args.workdir
 
         # Get the repository handler which is responsible for doing all the
         # CVS interaction in which the container build and Bakerman files are
         # stored.
-        repo_cls = discoverRepoHandler(workdir=args.workdir, uri=args.repo)
-        repo = repo_cls(uri=args.repo, workdir=args.workdir)
+        with metrics.timer("repo", repo=self.name):
+            repo_cls = discoverRepoHandler(workdir=args.workdir, uri=args.repo)
+            self.repo = repo_cls(
+                uri=args.repo, workdir=args.workdir, **repoOptions(args)
+            )
 
-        # Get the render handler which is responsible for rendering the
-        # `--template` file using the arguments the manifest handler comes up
-        # with
-        render_cls = discoverRenderHandler(args.workdir, args.template)
-        target_file = render_cls(args.workdir, args.template, args.target)
+        # Get the render handler of each template which is responsible for
+        # rendering it into its target using the arguments the manifest
+        # handler comes up with.
+        filesdir = self.repo.filesdir
+        self.targets = []
+        for template, target in renderPairs(args):
+            render_cls = discoverRenderHandler(filesdir, template)
+            self.targets.append(render_cls(filesdir, template, target))
 
         # Get the manifest handler which is responsible for reading and
         # writing the manifest file and returning a Python data structure.
-        manifest_cls = discoverManifestHandler(args.workdir, args.manifest)
-        manifest = manifest_cls(args.workdir, args.manifest)
-        manifest_content = manifest.read()
+        with metrics.timer("manifest_read", repo=self.name):
+            manifest_cls = discoverManifestHandler(filesdir, args.manifest)
+            self.manifest = manifest_cls(filesdir, args.manifest)
+            self.manifest_content = self.manifest.read()
+
+    def apply(self, variables: Dict[str, str]) -> List[str]:
+        """
+        Updates the manifest with the looked up `variables` and renders,
+        commits and pushes the target file if anything changed.
+
+        Args:
+            variables: The lookup value of each template variable.
 
-        # Get all the different lookup handlers needed to discover the latest
-        # values requested in the manifest file.  lookupVariables() is just a
-        # convenience function which takes care of this.
-        variables = lookupVariables(discoverLookupHandler, manifest_content)
+        Returns:
+            The list of changes which have been made.
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+        from bakerman import metrics
+
+        args = self.args
+        logger = getLogger("main")
+        commit_message = []
 
         # Update the content of the manifest for each variable we have found.
         # And write it
+        changed = self.manifest.updateVariables(variables)
         for key, value in variables.items():
-            if manifest.updateVariable(key, value):
+            if key in changed:
                 message = f"Variable '{key}' has been updated to '{value}'."
                 commit_message.append("- " + message)
                 logger.info(message)
             else:
-                logger.debug(f"Variable '{key}' has not changed.")
+                logger.debug("Variable '%s' has not changed.", key)
 
         # Write the manifest to disk
-        manifest_updated = manifest.write()
+        with metrics.timer("manifest_write", repo=self.name):
+            manifest_updated = self.manifest.write()
 
-        # Render the template file using the new found version numbers.
+        # Render the templates using the new found version numbers.
         if manifest_updated:
             logger.info(
-                f"The manifest has been updated. Regenerating target file '{args.workdir}/{args.target}'"
+                f"The manifest has been updated. Regenerating {len(self.targets)} target file(s)."
             )
-            target_file.render(variables)
+            with metrics.timer("render", repo=self.name), ThreadPoolExecutor(
+                max_workers=len(self.targets)
+            ) as executor:
+                rendered = executor.map(
+                    lambda target: target.render(variables), self.targets
+                )
+                for target, target_changed in zip(self.targets, rendered):
+                    if target_changed:
+                        logger.info("Target file '%s' has been updated.", target.target)
+                    else:
+                        logger.debug("Target file '%s' has not changed.", target.target)
 
             if args.no_repo:
                 logger.info(f"--no-repo set, not committing nor pushing any changes.")
             else:
                 logger.info(f"Committing changes and pushing repo.")
-                repo.commit(COMMIT_MESSAGE % "\n".join(commit_message))
-                repo.push()
+                with metrics.timer("commit", repo=self.name):
+                    self.repo.commit(COMMIT_MESSAGE % "\n".join(commit_message))
+                with metrics.timer("push", repo=self.name):
+                    self.repo.push()
         else:
             logger.info(
-                f"The manifest has not been updated. Not regenerating target file '{args.workdir}/{args.target}'"
+                f"The manifest has not been updated. Not regenerating any target file."
             )
 
+        return commit_message
+
+    def recordFingerprint(self, variables: Dict[str, str]) -> None:
+        """
+        Records the fingerprint of the finished run next to `--workdir`.
+
+        Args:
+            variables: The lookup value of each template variable.
+        """
+
+        from bakerman.fingerprint import computeFingerprint, contentDigest
+        from bakerman.fingerprint import writeFingerprint
+        from bakerman.plugin.manifest import Manifest
+
+        revision = self.repo.revision()
+        if revision is None:
+            return
+
+        manifest = self.manifest.read()
+        if isinstance(manifest, Manifest):
+            manifest = manifest.toData()
+
+        paths = repoPaths(self.args)
+        content = contentDigest(self.repo.filesdir, paths)
+        writeFingerprint(
+            self.args.workdir,
+            {
+                "uri": self.args.repo,
+                "paths": paths,
+                "revision": revision,
+                "content": content,
+                "manifest": manifest,
+                "fingerprint": computeFingerprint(content, variables),
+            },
+        )
+
+
+def upstreamFingerprint(args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    """
+    Returns the fingerprint recorded by the previous run when it still applies
+    to the repository and its upstream revision.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+
+    Returns:
+        The fingerprint record or None when the repository has to be processed.
+    """
+
+    from bakerman.fingerprint import readFingerprint
+    from bakerman.handler import discoverRepoHandler
+
+    logger = getLogger("main")
+    record = readFingerprint(args.workdir)
+    if (
+        record is None
+        or record["uri"] != args.repo
+        or record["paths"] != repoPaths(args)
+    ):
+        return None
+
+    try:
+        repo_cls = discoverRepoHandler(workdir=args.workdir, uri=args.repo)
+        revision = repo_cls.remoteRevision(uri=args.repo, workdir=args.workdir)
+    except Exception as err:
+        logger.debug("Can't determine the upstream revision. Reason: %s" % (err))
+        return None
+    if revision is None or revision != record["revision"]:
+        return None
+    return record
+
+
+def fingerprintUnchanged(
+    args: argparse.Namespace, cache: Optional["CacheSkeleton"] = None
+) -> bool:
+    """
+    Checks whether a run would change anything without cloning the repository
+    by comparing the upstream revision and the lookup results with the
+    fingerprint recorded by the previous run.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+        cache: The lookup result cache to use.
+
+    Returns:
+        True when the run can be skipped.
+    """
+
+    from bakerman.fingerprint import computeFingerprint
+    from bakerman.handler import discoverLookupHandler
+    from bakerman.helper import lookupVariables
+
+    record = upstreamFingerprint(args)
+    if record is None:
+        return False
+
+    variables = lookupVariables(
+        discoverLookupHandler,
+        record["manifest"],
+        workers=args.lookup_workers,
+        cache=cache,
+    )
+    return computeFingerprint(record["content"], variables) == record["fingerprint"]
+
+
+def run(args: argparse.Namespace, cache: Optional["CacheSkeleton"] = None) -> List[str]:
+    """
+    Main Bakerman logic.
+    Performs a lookup of all manifest variables, renders the template and
+    commits the changes if any of the variables has been updated.
+
+    Args:
+        args: The arguments of the run as defined by `buildParser`.
+        cache: The lookup result cache to use.
+
+    Returns:
+        The list of changes which have been made.
+    """
+
+    from bakerman import metrics
+    from bakerman.handler import discoverLookupHandler
+    from bakerman.helper import lookupVariables
+
+    name = args.repo or args.workdir
+    if args.fingerprint:
+        if cache is None:
+            from bakerman.cache import Memory
+
+            # Lets the run reuse the lookup results of the fingerprint check.
+            cache = Memory(parseCacheTTL(args.cache_ttl))
+        with metrics.timer("fingerprint", repo=name):
+            unchanged = fingerprintUnchanged(args, cache)
+        if unchanged:
+            getLogger("main").info(f"Fingerprint of '{name}' unchanged. Nothing to do.")
+            return []
+
+    job = Job(args)
+
+    # Get all the different lookup handlers needed to discover the latest
+    # values requested in the manifest file.  lookupVariables() is just a
+    # convenience function which takes care of this and runs the lookups
+    # concurrently.
+    with metrics.timer("lookups", repo=name):
+        variables = lookupVariables(
+            discoverLookupHandler,
+            job.manifest_content,
+            workers=args.lookup_workers,
+            cache=cache,
+        )
+
+    changes = job.apply(variables)
+    if args.fingerprint:
+        job.recordFingerprint(variables)
+
+    return changes
+
+
+def start(args: argparse.Namespace) -> None:
+    """
+    Executes a single Bakerman run from the CLI.
+
+    Raises:
+        Exception: An unhandled error happened and should be made clear to the
+        user as this indicates a bug for which a report should be made.
+    """
+
+    logger = getLogger("main")
+    try:
+        run(args, createCache(args))
+
     except NotImplementedError as err:
         logger.error("Fatal Error. Reason: %s" % (err))
         sys.exit(1)
 
+    except LookupFailed as err:
+        logger.error("Lookup failed. Reason: %s" % (err))
+        sys.exit(1)
+
     except Exception as err:
         print(
             "An unhandled error occurred. Please submit a bug report including the manifest, template and CLI command used. Reason: %s"
@@ -177,8 +791,26 @@ def start(args: argparse.Namespace) -> None:
 
 def main():
 
-    arguments = parseArguments()
-    start(arguments)
+    if sys.argv[1:2] == ["serve"]:
+        from bakerman.daemon import parseServeArguments, serve
+
+        arguments = parseServeArguments(sys.argv[2:])
+        configure(arguments)
+        serve(arguments)
+    else:
+        arguments = parseArguments()
+        configure(arguments)
+        try:
+            if arguments.repos_file:
+                from bakerman.batch import batch
+
+                results = batch(arguments)
+                if any(result["status"] == "failed" for result in results):
+                    sys.exit(1)
+            else:
+                start(arguments)
+        finally:
+            exportMetrics(arguments)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from bakerman import metrics
+from bakerman import Job, createCache, loadRepoArguments, upstreamFingerprint
+from bakerman.fingerprint import computeFingerprint
+from bakerman.handler import discoverLookupHandler
+from bakerman.helper import executeLookups, getLogger, planLookups
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = getLogger("batch")
+
+
+def batch(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Processes all repositories defined in `--repos-file`.
+
+    The repositories are prepared (cloned, manifest read) in parallel.  Then
+    each distinct lookup of all manifests is executed once, after which the
+    results are applied to each repository in parallel.  Repositories using
+    `--fingerprint` whose fingerprint is unchanged are skipped before
+    cloning.  The lookups of these fingerprint checks are planned together
+    too and their results are reused by the repositories which do change.
+
+    Args:
+        args: The parsed CLI arguments.
+
+    Returns:
+        A list containing the result of each repository.
+    """
+
+    repos = loadRepoArguments(args.repos_file, args)
+    cache = createCache(args)
+    results = [
+        {
+            "repo": repo_args.repo,
+            "workdir": repo_args.workdir,
+            "status": "pending",
+            "changes": [],
+            "error": None,
+        }
+        for repo_args in repos
+    ]
+
+    def check(index: int) -> Optional[Dict[str, Any]]:
+        if not repos[index].fingerprint:
+            return None
+        name = repos[index].repo or repos[index].workdir
+        try:
+            with metrics.timer("fingerprint", repo=name):
+                return upstreamFingerprint(repos[index])
+        except (Exception, SystemExit) as err:
+            logger.debug(f"Fingerprint check of '{name}' failed. Reason: {err!r}")
+            return None
+
+    def prepare(index: int) -> Optional[Job]:
+        if results[index]["status"] != "pending":
+            return None
+        try:
+            return Job(repos[index])
+        except (Exception, SystemExit) as err:
+            fail(index, err)
+            return None
+
+    def apply(index: int, job: Job, variables: Dict[str, str]) -> None:
+        try:
+            results[index]["changes"] = job.apply(variables)
+            if repos[index].fingerprint:
+                job.recordFingerprint(variables)
+        except (Exception, SystemExit) as err:
+            fail(index, err)
+        else:
+            if results[index]["changes"]:
+                results[index]["status"] = "updated"
+            else:
+                results[index]["status"] = "unchanged"
+
+    def fail(index: int, err: BaseException) -> None:
+        logger.error(
+            f"Processing repository '{repos[index].repo or repos[index].workdir}' failed. Reason: {err!r}"
+        )
+        results[index]["status"] = "failed"
+        results[index]["error"] = repr(err)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.batch_workers)) as executor:
+        records = list(executor.map(check, range(len(repos))))
+
+    # Plan the lookups of all fingerprint checks together so lookups shared by
+    # multiple repositories are only executed once.
+    lookups: Dict[str, Tuple[str, Dict]] = {}
+    plans: Dict[int, Tuple[Dict[str, str], Dict[str, str]]] = {}
+    for index, record in enumerate(records):
+        if record is None:
+            continue
+        try:
+            record_lookups, dependencies, locked = planLookups(record["manifest"])
+        except Exception as err:
+            logger.debug(f"Ignoring unusable fingerprint. Reason: {err!r}")
+            continue
+        lookups.update(record_lookups)
+        plans[index] = (dependencies, locked)
+
+    values: Dict[str, Any] = {}
+    if lookups:
+        with metrics.timer("lookups", repo="fingerprint"):
+            values = executeLookups(
+                discoverLookupHandler,
+                lookups,
+                workers=args.lookup_workers,
+                cache=cache,
+                return_exceptions=True,
+            )
+    for index, (dependencies, locked) in plans.items():
+        variables = resolveVariables(dependencies, locked, values)
+        if not any(isinstance(value, Exception) for value in variables.values()) and (
+            computeFingerprint(records[index]["content"], variables)  # type: ignore
+            == records[index]["fingerprint"]  # type: ignore
+        ):
+            name = repos[index].repo or repos[index].workdir
+            logger.info(f"Fingerprint of '{name}' unchanged. Nothing to do.")
+            results[index]["status"] = "unchanged"
+
+    with ThreadPoolExecutor(max_workers=max(1, args.batch_workers)) as executor:
+        jobs = list(executor.map(prepare, range(len(repos))))
+
+    # Plan the lookups of all manifests together so lookups shared by multiple
+    # manifests are only executed once.  Lookups already executed by the
+    # fingerprint checks are reused.
+    lookups = {}
+    plans = {}
+    for index, job in enumerate(jobs):
+        if job is None:
+            continue
+        job_lookups, dependencies, locked = planLookups(job.manifest_content)
+        lookups.update(
+            (key, lookup) for key, lookup in job_lookups.items() if key not in values
+        )
+        plans[index] = (dependencies, locked)
+
+    logger.info(
+        f"Executing {len(lookups)} distinct lookups for {len(plans)} repositories."
+    )
+    with metrics.timer("lookups", repo="batch"):
+        values.update(
+            executeLookups(
+                discoverLookupHandler,
+                lookups,
+                workers=args.lookup_workers,
+                cache=cache,
+                return_exceptions=True,
+            )
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, args.batch_workers)) as executor:
+        for index, (dependencies, locked) in plans.items():
+            variables = resolveVariables(dependencies, locked, values)
+            errors = [
+                value for value in variables.values() if isinstance(value, Exception)
+            ]
+            if errors:
+                fail(index, errors[0])
+            else:
+                executor.submit(apply, index, jobs[index], variables)  # type: ignore
+
+    logSummary(results)
+    if args.summary_file:
+        with open(args.summary_file, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def resolveVariables(
+    dependencies: Dict[str, str], locked: Dict[str, str], values: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Assembles the template variables of a manifest from its lookup plan.
+
+    Args:
+        dependencies: The lookup key of each variable as returned by `planLookups`.
+        locked: The value of each locked variable as returned by `planLookups`.
+        values: The lookup results as returned by `executeLookups`.
+
+    Returns:
+        The value of each template variable.
+    """
+
+    variables = dict(locked)
+    for name, key in dependencies.items():
+        variables[name] = values[key]
+    return variables
+
+
+def logSummary(results: List[Dict[str, Any]]) -> None:
+    """
+    Logs the outcome of each repository and the totals.
+
+    Args:
+        results: The results returned by `batch`.
+    """
+
+    for result in results:
+        logger.info(
+            f"{result['status']:>9}  {result['repo'] or result['workdir']}"
+            + (f"  {result['error']}" if result["error"] else "")
+        )
+    totals: Dict[str, int] = {}
+    for result in results:
+        totals[result["status"]] = totals.get(result["status"], 0) + 1
+    logger.info(
+        "Processed %s repositories: %s"
+        % (
+            len(results),
+            ", ".join(f"{count} {status}" for status, count in sorted(totals.items())),
+        )
+    )
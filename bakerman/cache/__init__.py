@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from bakerman.helper import getLogger, makeKey
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+# `sqlite3` is only imported by the SQLite backend.
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = getLogger("cache")
+
+
+def getCache(backend: str, filename: str, ttls: Dict[str, int] = None) -> "Skeleton":
+    """
+    Factory function which returns a cache instance for `backend`.
+
+    Args:
+        backend: The name of the cache backend. (memory, json, sqlite)
+        filename: The file in which the cache is stored.
+        ttls: Per lookup type TTL values overriding the plugin defaults.
+
+    Returns:
+        A `bakerman.cache.Skeleton` instance.
+
+    Raises:
+        NotImplementedError: No cache backend exists with name `backend`.
+    """
+
+    if backend == "memory":
+        return Memory(ttls)
+    elif backend == "json":
+        return JSONFile(filename, ttls)
+    elif backend == "sqlite":
+        return SQLiteFile(filename, ttls)
+    else:
+        raise NotImplementedError("No cache backend '%s' available." % (backend))
+
+
+class Skeleton:
+    """
+    Base class for all lookup result cache backends.
+
+    Args:
+        ttls: Per lookup type TTL values overriding the plugin defaults.
+    """
+
+    def __init__(self, ttls: Dict[str, int] = None) -> None:
+        self.ttls = ttls or {}
+
+    def ttl(self, lookup_type: str, default: int) -> int:
+        """
+        Returns the TTL in seconds for results of `lookup_type`.
+
+        Args:
+            lookup_type: The manifest lookup type.
+            default: The TTL to use when none is configured for `lookup_type`.
+        """
+
+        return self.ttls.get(lookup_type, default)
+
+    def get(self, lookup_type: str, variables: Dict) -> Optional[str]:
+        """
+        Returns the cached, unexpired result of a lookup or `None`.
+
+        Args:
+            lookup_type: The manifest lookup type.
+            variables: The variables the lookup was executed with.
+        """
+        raise NotImplementedError(
+            "`%s` method not implemented by `%s` plugin."
+            % (sys._getframe().f_code.co_name, self.__class__)
+        )
+
+    def set(self, lookup_type: str, variables: Dict, value: str, ttl: int) -> None:
+        """
+        Stores the result of a lookup for `ttl` seconds.
+
+        Args:
+            lookup_type: The manifest lookup type.
+            variables: The variables the lookup was executed with.
+            value: The lookup result.
+            ttl: The number of seconds the result is valid.
+        """
+        raise NotImplementedError(
+            "`%s` method not implemented by `%s` plugin."
+            % (sys._getframe().f_code.co_name, self.__class__)
+        )
+
+
+class Memory(Skeleton):
+    """
+    A lookup result cache living in the memory of the current process.
+    """
+
+    def __init__(self, ttls: Dict[str, int] = None) -> None:
+        Skeleton.__init__(self, ttls)
+        self.__lock = threading.Lock()
+        self.__data: Dict[str, list] = {}
+
+    def get(self, lookup_type: str, variables: Dict) -> Optional[str]:
+        with self.__lock:
+            item = self.__data.get(makeKey(lookup_type, variables))
+        if item and item[1] > time.time():
+            return item[0]
+        return None
+
+    def set(self, lookup_type: str, variables: Dict, value: str, ttl: int) -> None:
+        with self.__lock:
+            self.__data[makeKey(lookup_type, variables)] = [value, time.time() + ttl]
+
+
+class JSONFile(Skeleton):
+    """
+    A lookup result cache stored in a JSON file.  Access is serialized using
+    `flock` on a `.lock` file next to the cache file so multiple processes on
+    the same host can share it.
+
+    Args:
+        filename: The JSON file storing the cache.
+        ttls: Per lookup type TTL values overriding the plugin defaults.
+    """
+
+    def __init__(self, filename: str, ttls: Dict[str, int] = None) -> None:
+        Skeleton.__init__(self, ttls)
+        self.filename = os.path.abspath(filename)
+        self.__lock = threading.Lock()
+        self.__data: Dict[str, list] = {}
+        self.__mtime: Optional[float] = None
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+
+    def get(self, lookup_type: str, variables: Dict) -> Optional[str]:
+        with self.__flock(fcntl.LOCK_SH):
+            self.__load()
+            item = self.__data.get(makeKey(lookup_type, variables))
+        if item and item[1] > time.time():
+            return item[0]
+        return None
+
+    def set(self, lookup_type: str, variables: Dict, value: str, ttl: int) -> None:
+        with self.__flock(fcntl.LOCK_EX):
+            self.__load()
+            now = time.time()
+            self.__data = {
+                key: item for key, item in self.__data.items() if item[1] > now
+            }
+            self.__data[makeKey(lookup_type, variables)] = [value, now + ttl]
+            fd, path = tempfile.mkstemp(dir=os.path.dirname(self.filename))
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.__data, f)
+            os.replace(path, self.filename)
+            self.__mtime = os.stat(self.filename).st_mtime
+
+    def __load(self) -> None:
+        try:
+            mtime = os.stat(self.filename).st_mtime
+        except FileNotFoundError:
+            self.__data = {}
+            return
+        if mtime != self.__mtime:
+            try:
+                with open(self.filename) as f:
+                    self.__data = json.load(f)
+            except ValueError as err:
+                logger.warning(
+                    "Ignoring corrupt cache file %s. Reason: %s" % (self.filename, err)
+                )
+                self.__data = {}
+            self.__mtime = mtime
+
+    @contextmanager
+    def __flock(self, operation: int) -> Iterator[None]:
+        with self.__lock:
+            with open(self.filename + ".lock", "a") as lock:
+                fcntl.flock(lock, operation)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SQLiteFile(Skeleton):
+    """
+    A lookup result cache stored in a SQLite database.  SQLite takes care of
+    the locking so multiple processes on the same host can share it.
+
+    Args:
+        filename: The SQLite database file storing the cache.
+        ttls: Per lookup type TTL values overriding the plugin defaults.
+    """
+
+    def __init__(self, filename: str, ttls: Dict[str, int] = None) -> None:
+        Skeleton.__init__(self, ttls)
+        self.filename = os.path.abspath(filename)
+        self.__local = threading.local()
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        # Only the owner can read the cached lookup results.  SQLite creates
+        # the WAL files with the same permissions.
+        os.close(os.open(self.filename, os.O_CREAT | os.O_WRONLY, 0o600))
+        with self.__connection() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS lookup "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def get(self, lookup_type: str, variables: Dict) -> Optional[str]:
+        row = (
+            self.__connection()
+            .execute(
+                "SELECT value FROM lookup WHERE key = ? AND expires > ?",
+                (makeKey(lookup_type, variables), time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, lookup_type: str, variables: Dict, value: str, ttl: int) -> None:
+        now = time.time()
+        with self.__connection() as c:
+            c.execute("DELETE FROM lookup WHERE expires <= ?", (now,))
+            c.execute(
+                "INSERT OR REPLACE INTO lookup (key, value, expires) VALUES (?, ?, ?)",
+                (makeKey(lookup_type, variables), value, now + ttl),
+            )
+
+    def __connection(self) -> "sqlite3.Connection":
+        # SQLite connections can't be shared between threads.
+        if not hasattr(self.__local, "connection"):
+            import sqlite3
+
+            connection = sqlite3.connect(self.filename, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.__local.connection = connection
+        return self.__local.connection
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import argparse
+import heapq
+import random
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from bakerman import addGlobalArguments, createCache, loadRepoArguments
+from bakerman import exportMetrics, parseCacheTTL, run
+from bakerman.cache import Memory
+from bakerman.cache import Skeleton as CacheSkeleton
+from bakerman.helper import getLogger
+from typing import Dict, List, Tuple
+
+logger = getLogger("daemon")
+
+
+def parseServeArguments(argv: List[str] = None) -> argparse.Namespace:
+    """
+    Defines and parses the CLI arguments of `bakerman serve`.
+
+    Args:
+        argv: The arguments to parse.
+
+    Returns:
+        - NameSpace object containing all arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="bakerman serve",
+        description="Periodically run Bakerman for a list of repositories.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--repos-file",
+        type=str,
+        dest="repos_file",
+        required=True,
+        help="A JSON file containing a list of repository definitions. Each definition uses the keys of the single run CLI arguments (repo, workdir, manifest, template, target, no_repo) and an optional 'interval'.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        dest="interval",
+        default=3600,
+        help="The default number of seconds between two runs of a repository.",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        dest="jitter",
+        default=300,
+        help="The maximum number of random seconds added to each interval to spread the runs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        dest="workers",
+        default=4,
+        help="The maximum number of repositories processed at the same time.",
+    )
+    addGlobalArguments(parser)
+
+    return parser.parse_args(argv)
+
+
+class Daemon:
+    """
+    Runs Bakerman for a list of repositories on a schedule.  Everything which
+    can be reused between runs such as plugin classes, HTTP connection pools,
+    Docker Hub tokens and lookup results is kept in memory for the lifetime
+    of the process.
+
+    Args:
+        repos: The arguments of each repository run.
+        cache: The lookup result cache shared by all runs.
+        interval: The default number of seconds between two runs of a repo.
+        jitter: The maximum number of random seconds added to each interval.
+        workers: The maximum number of repositories processed concurrently.
+    """
+
+    def __init__(
+        self,
+        repos: List[argparse.Namespace],
+        cache: CacheSkeleton,
+        interval: float = 3600,
+        jitter: float = 300,
+        workers: int = 4,
+    ) -> None:
+        self.repos = repos
+        self.cache = cache
+        self.interval = interval
+        self.jitter = jitter
+        self.workers = workers
+        self.__stop = threading.Event()
+
+    def stop(self, *args) -> None:
+        """
+        Stops the daemon once the running repositories are finished.
+        """
+
+        logger.info("Stopping. Waiting for running repositories to finish.")
+        self.__stop.set()
+
+    def serve(self) -> None:
+        """
+        Blocks and processes each repository when it's due until `stop()` is
+        called.
+        """
+
+        # Spread the first runs over the jitter window.
+        schedule: List[Tuple[float, int]] = [
+            (time.time() + random.uniform(0, self.jitter), index)
+            for index in range(len(self.repos))
+        ]
+        heapq.heapify(schedule)
+        running: Dict[Future, int] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            while not self.__stop.is_set():
+                now = time.time()
+                while (
+                    schedule and schedule[0][0] <= now and len(running) < self.workers
+                ):
+                    _, index = heapq.heappop(schedule)
+                    running[executor.submit(self.__runRepo, index)] = index
+
+                if running:
+                    if schedule and len(running) < self.workers:
+                        timeout = max(0, schedule[0][0] - now)
+                    else:
+                        timeout = None
+                    done, _ = wait(
+                        running, timeout=timeout, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        index = running.pop(future)
+                        heapq.heappush(schedule, (self.__nextRun(index), index))
+                elif schedule:
+                    self.__stop.wait(max(0, schedule[0][0] - now))
+                else:
+                    break
+
+            wait(running)
+
+    def __runRepo(self, index: int) -> None:
+
+        args = self.repos[index]
+        logger.info(f"Processing repository '{args.repo or args.workdir}'.")
+        try:
+            run(args, self.cache)
+        except (Exception, SystemExit) as err:
+            logger.error(
+                f"Processing repository '{args.repo or args.workdir}' failed. Reason: {err!r}"
+            )
+        # The metrics accumulate over the lifetime of the daemon.
+        exportMetrics(args)
+
+    def __nextRun(self, index: int) -> float:
+
+        interval = getattr(self.repos[index], "interval", None) or self.interval
+        return time.time() + interval + random.uniform(0, self.jitter)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """
+    Runs Bakerman as a long running process as defined by the
+    `parseServeArguments` arguments.
+
+    Args:
+        args: The parsed `bakerman serve` arguments.
+    """
+
+    repos = loadRepoArguments(args.repos_file, args)
+    for repo_args in repos:
+        # Each run reuses the workdir of the previous one, which is outdated
+        # as soon as someone else pushes.
+        repo_args.refresh = True
+    cache = createCache(args) or Memory(parseCacheTTL(args.cache_ttl))
+    daemon = Daemon(
+        repos,
+        cache,
+        interval=args.interval,
+        jitter=args.jitter,
+        workers=args.workers,
+    )
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    logger.info(f"Serving {len(repos)} repositories.")
+    daemon.serve()
@@ -25,3 +25,7 @@
 
 class PrerequisitesNotMet(Exception):
     pass
+
+
+class LookupFailed(Exception):
+    pass
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+"""
+A fingerprint records the outcome of a run: the repository revision, a
+digest of the manifest and template and the lookup results.  When the
+upstream repository is still at the recorded revision and the lookups return
+the recorded results a new run can't change anything and is skipped before
+cloning, rendering or any other git work.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from bakerman.helper import getLogger
+from typing import Any, Dict, List, Optional
+
+logger = getLogger("fingerprint")
+
+
+def fingerprintFile(workdir: str) -> str:
+    """
+    Returns the file storing the fingerprint of `workdir`.  It's stored next
+    to the workdir so it never ends up in the repository.
+
+    Args:
+        workdir: The directory containing the repository.
+    """
+
+    return os.path.abspath(workdir).rstrip(os.sep) + ".fingerprint"
+
+
+def contentDigest(directory: str, paths: List[str]) -> str:
+    """
+    Returns the digest of the content of `paths`.  Missing files are
+    included as such and directories are digested recursively.
+
+    Args:
+        directory: The directory containing `paths`.
+        paths: The files to digest.
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        filename = os.path.join(directory, path)
+        if os.path.isdir(filename):
+            # A directory such as a sharded manifest is digested file by file.
+            files = sorted(
+                os.path.relpath(os.path.join(root, name), directory)
+                for root, _, names in os.walk(filename)
+                for name in names
+            )
+            digest.update(contentDigest(directory, files).encode("utf-8"))
+            continue
+        digest.update(path.encode("utf-8") + b"\0")
+        try:
+            with open(filename, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except FileNotFoundError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def computeFingerprint(content: str, variables: Dict[str, str]) -> str:
+    """
+    Combines a content digest and the lookup results into a fingerprint.
+
+    Args:
+        content: The digest returned by `contentDigest`.
+        variables: The lookup value of each template variable.
+    """
+
+    return hashlib.sha256(
+        json.dumps([content, variables], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def readFingerprint(workdir: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the fingerprint recorded for `workdir` or `None`.
+
+    Args:
+        workdir: The directory containing the repository.
+    """
+
+    try:
+        with open(fingerprintFile(workdir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as err:
+        logger.warning(
+            "Ignoring corrupt fingerprint %s. Reason: %s"
+            % (fingerprintFile(workdir), err)
+        )
+        return None
+
+
+def writeFingerprint(workdir: str, record: Dict[str, Any]) -> None:
+    """
+    Atomically stores the fingerprint of `workdir`.
+
+    Args:
+        workdir: The directory containing the repository.
+        record: The fingerprint to store.
+    """
+
+    filename = fingerprintFile(workdir)
+    fd, path = tempfile.mkstemp(dir=os.path.dirname(filename))
+    with os.fdopen(fd, "w") as f:
+        json.dump(record, f)
+    os.replace(path, filename)
@@ -36,8 +36,73 @@ from bakerman.plugin.lookup import Skeleton as SkeletonLookup
 
 import importlib
 import pkgutil
+import threading
 
-from typing import Type
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+# Third party plugins register themselves using these entry point groups.
+# Repo, render and manifest entry points refer to a module offering a
+# `discovery` function.  Lookup entry points are named after the lookup type
+# and refer to either such a module or directly to the plugin class.
+ENTRY_POINT_GROUP = "bakerman.plugin.%s"
+
+PACKAGES = {"repo": repo, "render": render, "manifest": manifest, "lookup": lookup}
+
+# The plugins of each kind as a list of (name, loader) tuples.  Built once per
+# process, plugin modules are only imported when their loader is called.
+_registry: Dict[str, List[Tuple[str, Callable[[], Any]]]] = {}
+_lookup_handlers: Dict[str, Type[SkeletonLookup]] = {}
+_registry_lock = threading.RLock()
+
+
+def getPlugins(kind: str) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Returns all available plugins of `kind` without importing them.
+
+    Args:
+        kind: The kind of plugin. (repo, render, manifest, lookup)
+
+    Returns:
+        A list of (name, loader) tuples.  Calling a loader imports the plugin
+        and returns the plugin module or class.
+    """
+
+    with _registry_lock:
+        if kind not in _registry:
+            plugins = []
+            for plugin in pkgutil.iter_modules(PACKAGES[kind].__path__):  # type: ignore  # mypy issue #1422
+                plugins.append(
+                    (plugin.name, _moduleLoader(f".plugin.{kind}.{plugin.name}"))
+                )
+            for entry_point in _entryPoints(ENTRY_POINT_GROUP % (kind)):
+                plugins.append((entry_point.name, entry_point.load))
+            _registry[kind] = plugins
+        return _registry[kind]
+
+
+def _moduleLoader(name: str) -> Callable[[], ModuleType]:
+    return lambda: importlib.import_module(name, package="bakerman")
+
+
+def _entryPoints(group: str) -> List[Any]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    else:  # Python < 3.10
+        return list(eps.get(group, []))  # type: ignore
+
+
+def _discover(kind: str, *args: Any, **kwargs: Any) -> Optional[Any]:
+    for _, loader in getPlugins(kind):
+        m = loader().discovery(*args, **kwargs)
+        if m:
+            return m
+    return None
 
 
 def discoverRepoHandler(uri: str, workdir: str) -> Type[SkeletonRepo]:
@@ -57,13 +122,9 @@ def discoverRepoHandler(uri: str, workdir: str) -> Type[SkeletonRepo]:
                              provided `uri`.
     """
 
-    for repo_plugin in pkgutil.iter_modules(repo.__path__):  # type: ignore  # mypy issue #1422
-        module = importlib.import_module(
-            ".plugin.repo.%s" % repo_plugin.name, package="bakerman"
-        )
-        m = module.discovery(uri=uri, workdir=workdir)  # type: ignore # I don't understand this
-        if m:
-            return m
+    m = _discover("repo", uri=uri, workdir=workdir)
+    if m:
+        return m
 
     raise NotImplementedError("No suitable 'repo' plugin found for '%s'" % (uri))
 
@@ -84,13 +145,10 @@ def discoverRenderHandler(workdir: str, filename: str) -> Type[SkeletonRender]:
         NotImplementedError: No suitable repo plugin was found for the
                              provided `filename`.
     """
-    for plugin in pkgutil.iter_modules(render.__path__):  # type: ignore  # mypy issue #1422
-        module = importlib.import_module(
-            ".plugin.render.%s" % plugin.name, package="bakerman"
-        )
-        m = module.discovery(workdir, filename)  # type: ignore
-        if m:
-            return m
+
+    m = _discover("render", workdir, filename)
+    if m:
+        return m
 
     raise NotImplementedError(
         "No suitable 'render' plugin found for '%s/%s'" % (workdir, filename)
@@ -113,13 +171,10 @@ def discoverManifestHandler(workdir: str, filename: str) -> Type[SkeletonManifes
         NotImplementedError: No suitable repo plugin was found for the
                              provided `filename`.
     """
-    for plugin in pkgutil.iter_modules(manifest.__path__):  # type: ignore  # mypy issue #1422
-        module = importlib.import_module(
-            ".plugin.manifest.%s" % plugin.name, package="bakerman"
-        )
-        m = module.discovery(workdir, filename)  # type: ignore
-        if m:
-            return m
+
+    m = _discover("manifest", workdir, filename)
+    if m:
+        return m
 
     raise NotImplementedError(
         "No suitable 'manifest' plugin found for '%s/%s'" % (workdir, filename)
@@ -130,6 +185,10 @@ def discoverLookupHandler(name: str) -> Type[SkeletonLookup]:
     """
     Factory function which returns a suitable Module for the provided arguments.
 
+    The result is cached per process.  A plugin named after the lookup type is
+    tried first so usually only the module of the requested plugin is
+    imported.
+
     Args:
         name: A string identifying the lookup type.  The `discovery` functions
               use this string to identify the plugin.
@@ -141,12 +200,23 @@ def discoverLookupHandler(name: str) -> Type[SkeletonLookup]:
         NotImplementedError: No suitable repo plugin was found for the
                              provided `filename`.
     """
-    for plugin in pkgutil.iter_modules(lookup.__path__):  # type: ignore  # mypy issue #1422
-        module = importlib.import_module(
-            ".plugin.lookup.%s" % plugin.name, package="bakerman"
-        )
-        m = module.discovery(name)  # type: ignore
-        if m:
-            return m
+
+    with _registry_lock:
+        if name in _lookup_handlers:
+            return _lookup_handlers[name]
+
+        plugins = getPlugins("lookup")
+        candidates = [p for p in plugins if p[0] == name]
+        candidates += [p for p in plugins if p[0] != name]
+        for plugin_name, loader in candidates:
+            plugin = loader()
+            if isinstance(plugin, type):
+                # An entry point referring directly to the plugin class.
+                m = plugin if plugin_name == name else None
+            else:
+                m = plugin.discovery(name)
+            if m:
+                _lookup_handlers[name] = m
+                return m
 
     raise NotImplementedError("No suitable 'lookup' plugin found for type '%s" % (name))
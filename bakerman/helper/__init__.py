@@ -21,41 +21,222 @@
 #  MA 02110-1301, USA.
 #
 
+import hashlib
+import json
 import logging
 import sys
 import subprocess
-from typing import Dict, Union, Any, List
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Union, Any, List, Tuple
+
+
+def makeKey(lookup_type: str, variables: Dict) -> str:
+    """
+    Returns the key identifying a lookup.  The variables are hashed as they
+    can contain credentials such as a Gitlab token and the key ends up in the
+    lookup cache.
+
+    Args:
+        lookup_type: The manifest lookup type such as `docker_hub`.
+        variables: The `variables` dict of the manifest value.
+
+    Returns:
+        A string uniquely identifying the lookup.
+    """
+
+    digest = hashlib.sha256(
+        json.dumps([lookup_type, variables], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return "%s:%s" % (lookup_type, digest)
+
+
+def planLookups(
+    manifest: Any,
+) -> Tuple[Dict[str, Tuple[str, Dict]], Dict[str, str], Dict[str, str]]:
+    """
+    Builds the minimal set of lookups required to resolve all variables of
+    the manifest.  Values which are locked don't require a lookup as their
+    current value is used.  Values sharing the same lookup type and variables
+    share a single lookup.
+
+    Args:
+        manifest: A `bakerman.plugin.manifest.Manifest` instance or the dict
+                  representation of the manifest file.
+
+    Returns:
+        A tuple containing the distinct lookups by key, the lookup key of each
+        template variable requiring a lookup and the current value of each
+        locked template variable.
+    """
+
+    from bakerman.plugin.manifest import Manifest
+
+    if not isinstance(manifest, Manifest):
+        manifest = Manifest.fromData(manifest)
+
+    lookups = {}
+    dependencies = {}
+    locked = {}
+    for entry in manifest:
+        for value in entry.values:
+            if value.locked:
+                locked[value.template_arg_name] = value.current_value
+            else:
+                key = makeKey(entry.type, value.variables)
+                lookups[key] = (entry.type, value.variables)
+                dependencies[value.template_arg_name] = key
+    return lookups, dependencies, locked
 
 
 # TODO(smetj): Can't define type of lookup_handler as I'm running into a circular import issue
-def lookupVariables(lookup_handler: Any, manifest: List[dict]) -> Dict[str, str]:
+def lookupVariables(
+    lookup_handler: Any, manifest: Any, workers: int = 8, cache: Any = None
+) -> Dict[str, str]:
     """
-    Does a lookup for each variable defined in the manifest.
+    Does a lookup for each variable defined in the manifest.  Each distinct
+    lookup is only executed once and locked variables keep their current
+    value without doing a lookup.
 
     Args:
         lookup_handler: A `bakerman.handler.discoverLookupHandler` instance.
-        manifest: Dict representation of the manifest file.
+        manifest: A `bakerman.plugin.manifest.Manifest` instance or the dict
+                  representation of the manifest file.
+        workers: The maximum number of lookups executed at the same time.
+        cache: A `bakerman.cache.Skeleton` instance consulted before doing
+               the actual lookup.
 
     Returns:
         A dictionary containing each variable and lookup value.
     """
-    manifest_value_render_cache = {}  # type: ignore
+    from bakerman.plugin.manifest import Manifest
+
+    if not isinstance(manifest, Manifest):
+        manifest = Manifest.fromData(manifest)
+
+    lookups, dependencies, locked = planLookups(manifest)
+    results = executeLookups(lookup_handler, lookups, workers=workers, cache=cache)
+
     variables = {}
     for entry in manifest:
-        for value in entry["values"]:
-            if entry["type"] not in manifest_value_render_cache:
-                manifest_value_render_cache[entry["type"]] = lookup_handler(
-                    entry["type"]
-                )()
-            variables[value["template_arg_name"]] = manifest_value_render_cache[
-                entry["type"]
-            ].lookup(**value["variables"])
+        for value in entry.values:
+            name = value.template_arg_name
+            if name in dependencies:
+                variables[name] = results[dependencies[name]]
+            else:
+                variables[name] = locked[name]
     return variables
 
 
+def executeLookups(
+    lookup_handler: Any,
+    lookups: Dict[str, Tuple[str, Dict]],
+    workers: int = 8,
+    cache: Any = None,
+    return_exceptions: bool = False,
+) -> Dict[str, Any]:
+    """
+    Executes the provided lookups.
+
+    The lookups are executed concurrently on a pool of `workers` threads.  The
+    number of lookups running at the same time for a single lookup type is
+    bound by the `concurrency` attribute of its plugin class.  Plugins which
+    don't subclass `bakerman.plugin.lookup.Skeleton` are wrapped in a
+    `bakerman.plugin.lookup.Adapter`.  The cache is consulted before the
+    plugins are prepared so their `prepare()` only receives the lookups which
+    are actually executed.
+
+    Args:
+        lookup_handler: A `bakerman.handler.discoverLookupHandler` instance.
+        lookups: A dictionary mapping an arbitrary ID to the lookup type and
+                 the variables of the lookup.
+        workers: The maximum number of lookups executed at the same time.
+        cache: A `bakerman.cache.Skeleton` instance consulted before doing
+               the actual lookup.
+        return_exceptions: When `True` a failing lookup doesn't abort the
+                           other lookups and its exception is returned as
+                           its value.  When the plugin of a lookup type
+                           can't be discovered or prepared, the exception is
+                           returned as the value of all lookups of that type.
+
+    Returns:
+        A dictionary containing the lookup value of each ID.
+    """
+    from bakerman import metrics
+    from bakerman.plugin.lookup import Adapter, Skeleton
+
+    manifest_value_render_cache = {}  # type: ignore
+    pending = {}  # type: ignore
+    results = {}
+    for lookup_id, (lookup_type, variables) in lookups.items():
+        if cache is not None:
+            value = cache.get(lookup_type, variables)
+            if value is not None:
+                metrics.increment("cache_hits", type=lookup_type)
+                results[lookup_id] = value
+                continue
+            metrics.increment("cache_misses", type=lookup_type)
+        if lookup_type not in pending:
+            pending[lookup_type] = deque()
+        pending[lookup_type].append((lookup_id, variables))
+
+    for lookup_type, items in list(pending.items()):
+        try:
+            plugin = lookup_handler(lookup_type)()
+            if not isinstance(plugin, Skeleton):
+                plugin = Adapter(plugin)
+            plugin.prepare([variables for _, variables in items])
+        except (Exception, SystemExit) as err:
+            if not return_exceptions:
+                raise
+            for lookup_id, _ in pending.pop(lookup_type):
+                results[lookup_id] = err
+        else:
+            manifest_value_render_cache[lookup_type] = plugin
+
+    running = {}  # type: ignore
+    active = dict.fromkeys(pending, 0)
+
+    def schedule(executor: ThreadPoolExecutor, lookup_type: str) -> None:
+        plugin = manifest_value_render_cache[lookup_type]
+        while pending[lookup_type] and active[lookup_type] < plugin.concurrency:
+            lookup_id, variables = pending[lookup_type].popleft()
+            future = executor.submit(plugin.storedLookup, cache, lookup_type, variables)
+            running[future] = (lookup_type, lookup_id)
+            active[lookup_type] += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        try:
+            for lookup_type in pending:
+                schedule(executor, lookup_type)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    lookup_type, lookup_id = running.pop(future)
+                    active[lookup_type] -= 1
+                    if return_exceptions and future.exception():
+                        results[lookup_id] = future.exception()
+                    else:
+                        results[lookup_id] = future.result()
+                    schedule(executor, lookup_type)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+    return {lookup_id: results[lookup_id] for lookup_id in lookups}
+
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# The listener writing the records queued by `setupLogging(use_queue=True)`.
+_listener: Any = None
+
+
 def getLogger(name=None) -> logging.Logger:
     """
-    Returns a logger object
+    Returns a logger object.  All Bakerman loggers are children of the
+    `bakerman` logger which is configured once by `setupLogging`.
 
     Args:
         name: The name of the logger object
@@ -64,17 +245,60 @@ def getLogger(name=None) -> logging.Logger:
         The `logging.Logger` instance.
     """
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    if name is None:
+        return logging.getLogger("bakerman")
+    return logging.getLogger("bakerman.%s" % (name))
+
+
+def stopListener() -> None:
+    """
+    Stops the listener started by `setupLogging(use_queue=True)`, if any,
+    after it wrote all queued records.
+    """
+
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setupLogging(level: str = "INFO", use_queue: bool = False) -> None:
+    """
+    Configures the single handler writing the records of all Bakerman loggers
+    to STDOUT.  Calling it again replaces the previous configuration.
+
+    Args:
+        level: The minimum level of the records to write.
+        use_queue: Hand the records to a background thread writing them so
+                   logging doesn't block the threads doing the work.
+    """
+
+    global _listener
+
+    logger = logging.getLogger("bakerman")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    stopListener()
+
+    handler: logging.Handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    if use_queue:
+        import atexit
+        import queue
+        from logging.handlers import QueueHandler, QueueListener
+
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(records, handler)
+        _listener.start()
+        # Keep a single hook however often the logging is reconfigured.
+        atexit.unregister(stopListener)
+        atexit.register(stopListener)
+        handler = QueueHandler(records)
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    handler.setFormatter(formatter)
     logger.addHandler(handler)
-    return logger
+    logger.setLevel(level)
+    logger.propagate = False
 
 
 def executeCommand(
@@ -93,7 +317,7 @@ def executeCommand(
     try:
         result = subprocess.run(command, capture_output=True, shell=False, check=True)
     except Exception as err:
-        logger.debug(f"Failed to executed command '{c}'. Reason: {err}")
+        logger.debug("Failed to executed command '%s'. Reason: %s", c, err)
         raise Exception(f"Failed to executed command '{c}'. Reason: {err}")
 
     else:
@@ -105,7 +329,9 @@ def executeCommand(
         else:
             output = result.stdout.decode("utf-8").rstrip()
             error = result.stderr.decode("utf-8").rstrip()
-            logger.debug(f"Failed to execute command '{c}'. Reason: {error} {output}")
+            logger.debug(
+                "Failed to execute command '%s'. Reason: %s %s", c, error, output
+            )
             raise Exception(
                 f"Failed to execute command '{c}'. Reason: {error} {output}"
             )
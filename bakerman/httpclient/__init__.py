@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import threading
+from urllib.parse import urlsplit
+from bakerman import metrics
+from typing import TYPE_CHECKING, Any, Dict
+
+# `requests` is imported when the first session is created as it is
+# relatively expensive to import and not required by every Bakerman run.
+if TYPE_CHECKING:
+    import requests
+
+SETTINGS: Dict[str, Any] = {
+    "pool_size": 10,
+    "retries": 3,
+    "backoff": 0.5,
+    "timeout": 30,
+}
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_sessions: Dict[str, "requests.Session"] = {}
+_lock = threading.Lock()
+
+
+def configure(**settings: Any) -> None:
+    """
+    Changes the settings used for all subsequently created sessions.
+
+    Args:
+        pool_size: The number of connections kept alive per host.
+        retries: The number of times a failed request is retried.
+        backoff: The backoff factor in seconds between retries.
+        timeout: The default connect and read timeout in seconds.
+    """
+
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            raise TypeError("Unknown HTTP client setting '%s'" % (key))
+        if value is not None:
+            SETTINGS[key] = value
+
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def getSession(url: str) -> "requests.Session":
+    """
+    Returns the pooled session for the host of `url`.  Connections are kept
+    alive and reused across lookups.  Requests failing with a connection
+    error or any of the `RETRY_STATUS` codes are retried with an exponential
+    backoff, honoring the `Retry-After` header.
+
+    Args:
+        url: The URL for which a session is required.
+
+    Returns:
+        The `requests.Session` instance for the host of `url`.
+    """
+
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+
+    with _lock:
+        if host not in _sessions:
+            _sessions[host] = _createSession(host)
+        return _sessions[host]
+
+
+def _createSession(host: str) -> "requests.Session":
+
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry  # type: ignore
+
+    class Session(requests.Session):
+        """
+        A `requests.Session` applying the configured timeout to each request
+        which doesn't define one explicitly.
+        """
+
+        def request(self, *args, **kwargs):  # type: ignore
+            kwargs.setdefault("timeout", SETTINGS["timeout"])
+            return requests.Session.request(self, *args, **kwargs)
+
+    retry = Retry(
+        total=SETTINGS["retries"],
+        backoff_factor=SETTINGS["backoff"],
+        status_forcelist=RETRY_STATUS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=SETTINGS["pool_size"],
+        max_retries=retry,
+    )
+    session = Session()
+    session.mount(host, adapter)
+    return session
+
+
+def get(url: str, **kwargs: Any) -> "requests.Response":
+    """
+    Does a GET request for `url` using the pooled session of its host.
+
+    Args:
+        url: The URL to request.
+        kwargs: Keyword arguments passed to `requests.Session.get`.
+
+    Returns:
+        The `requests.Response` instance.
+    """
+
+    response = getSession(url).get(url, **kwargs)
+    host = urlsplit(url).netloc
+    metrics.increment("http_requests", host=host, status=response.status_code)
+    metrics.increment("http_bytes", len(response.content), host=host)
+    return response
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Metrics are identified by their name and their sorted labels.
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_timers: Dict[MetricKey, List[float]] = {}
+_counters: Dict[MetricKey, float] = {}
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return (name, tuple(sorted((key, str(value)) for key, value in labels.items())))
+
+
+@contextmanager
+def timer(phase: str, **labels: Any) -> Iterator[None]:
+    """
+    Records the duration of the wrapped block as `phase`.
+
+    Args:
+        phase: The name of the timed phase such as `clone` or `lookup`.
+        labels: Labels identifying the timed subject such as the repository.
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        key = _key(phase, labels)
+        with _lock:
+            stats = _timers.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    """
+    Increments counter `name` by `value`.
+
+    Args:
+        name: The name of the counter such as `http_requests`.
+        value: The value to add.
+        labels: Labels identifying the counted subject such as the host.
+    """
+
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def reset() -> None:
+    """
+    Removes all recorded metrics.
+    """
+
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def summary() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Returns all recorded metrics.
+
+    Returns:
+        A dictionary containing a list of `timers` with their count, total
+        and maximum duration in seconds and a list of `counters`.
+    """
+
+    with _lock:
+        timers = [
+            {
+                "phase": name,
+                "labels": dict(labels),
+                "count": stats[0],
+                "seconds": round(stats[1], 6),
+                "max_seconds": round(stats[2], 6),
+            }
+            for (name, labels), stats in sorted(_timers.items())
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+    return {"timers": timers, "counters": counters}
+
+
+def prometheus() -> str:
+    """
+    Returns all recorded metrics in the Prometheus text format.
+    """
+
+    def labelString(labels: Dict[str, str]) -> str:
+        if not labels:
+            return ""
+        escaped = (
+            '%s="%s"'
+            % (
+                key,
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+            )
+            for key, value in labels.items()
+        )
+        return "{%s}" % (",".join(escaped))
+
+    data = summary()
+    lines = [
+        "# HELP bakerman_phase_seconds Time spent in each phase of a run.",
+        "# TYPE bakerman_phase_seconds summary",
+    ]
+    for item in data["timers"]:
+        labels = labelString(dict(phase=item["phase"], **item["labels"]))
+        lines.append(f"bakerman_phase_seconds_sum{labels} {item['seconds']}")
+        lines.append(f"bakerman_phase_seconds_count{labels} {item['count']}")
+
+    names = sorted(set(item["name"] for item in data["counters"]))
+    for name in names:
+        lines.append(f"# TYPE bakerman_{name}_total counter")
+        for item in data["counters"]:
+            if item["name"] == name:
+                labels = labelString(item["labels"])
+                lines.append(f"bakerman_{name}_total{labels} {item['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def export(json_file: str = None, textfile: str = None) -> None:
+    """
+    Atomically writes the recorded metrics to the defined files.
+
+    Args:
+        json_file: The file to write the JSON summary to.
+        textfile: The file to write the metrics to in the Prometheus text
+                  format, to be picked up by the node exporter textfile
+                  collector.
+    """
+
+    for filename, content in (
+        (json_file, lambda: json.dumps(summary(), indent=2)),
+        (textfile, prometheus),
+    ):
+        if not filename:
+            continue
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            f.write(content())
+        os.chmod(path, 0o644)
+        os.replace(path, filename)
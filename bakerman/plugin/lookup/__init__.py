@@ -24,12 +24,118 @@
 
 from . import *
 import sys
-from typing import Optional
+from bakerman import metrics
+from typing import Any, Dict, List, Optional
 
 
 class Skeleton:
+    """
+    Base class for all Lookup plugin modules
+
+    Attributes:
+        concurrency: The maximum number of lookups of this plugin which are
+                     allowed to run at the same time.
+        cache_ttl: The default number of seconds a lookup result of this
+                   plugin is kept in the lookup cache.
+    """
+
+    concurrency = 4
+    cache_ttl = 3600
+
+    def prepare(self, variables: List[Dict]) -> None:
+        """
+        Called once with the variables of all upcoming lookups of this plugin
+        before any of them is executed.  Allows plugins to batch requests
+        shared by multiple lookups.  Lookups answered by the lookup cache
+        aren't included and it isn't called when all of them are.
+
+        Args:
+            variables: The keyword arguments of all upcoming `lookup()` calls.
+        """
+
+        return None
+
+    def cachedLookup(
+        self, cache: Any, lookup_type: str, variables: Dict
+    ) -> Optional[str]:
+        """
+        Returns the result of `lookup()` consulting `cache` first.
+
+        Args:
+            cache: A `bakerman.cache.Skeleton` instance or `None` to disable
+                   caching.
+            lookup_type: The manifest lookup type this plugin was discovered
+                         for.
+            variables: The keyword arguments passed to `lookup()`.
+
+        Returns:
+            A version number.
+        """
+
+        if cache is not None:
+            value = cache.get(lookup_type, variables)
+            if value is not None:
+                metrics.increment("cache_hits", type=lookup_type)
+                return value
+            metrics.increment("cache_misses", type=lookup_type)
+        return self.storedLookup(cache, lookup_type, variables)
+
+    def storedLookup(
+        self, cache: Any, lookup_type: str, variables: Dict
+    ) -> Optional[str]:
+        """
+        Returns the result of `lookup()` and stores it in `cache` without
+        consulting it first.
+
+        Args:
+            cache: A `bakerman.cache.Skeleton` instance or `None` to disable
+                   caching.
+            lookup_type: The manifest lookup type this plugin was discovered
+                         for.
+            variables: The keyword arguments passed to `lookup()`.
+
+        Returns:
+            A version number.
+        """
+
+        with metrics.timer("lookup", type=lookup_type):
+            value = self.lookup(**variables)
+        if cache is not None and value is not None:
+            cache.set(
+                lookup_type,
+                variables,
+                value,
+                cache.ttl(lookup_type, self.cache_ttl),
+            )
+        return value
+
     def lookup(self, name: str) -> Optional[str]:
         raise NotImplementedError(
             "`%s` method not implemented by `%s` plugin."
             % (sys._getframe().f_code.co_name, self.__class__)
         )
+
+
+class Adapter(Skeleton):
+    """
+    Wraps a lookup plugin which doesn't subclass `Skeleton` but only offers a
+    `lookup()` method, so it's scheduled and cached like any other plugin.
+    The `concurrency`, `cache_ttl` and `prepare()` of the plugin are used
+    when it defines them.
+
+    Args:
+        plugin: The lookup plugin instance.
+    """
+
+    def __init__(self, plugin: Any) -> None:
+        self.plugin = plugin
+        self.concurrency = getattr(plugin, "concurrency", Skeleton.concurrency)
+        self.cache_ttl = getattr(plugin, "cache_ttl", Skeleton.cache_ttl)
+
+    def prepare(self, variables: List[Dict]) -> None:
+        prepare = getattr(self.plugin, "prepare", None)
+        if prepare is not None:
+            prepare(variables)
+
+    def lookup(self, **kwargs: Any) -> Optional[str]:  # type: ignore
+        return self.plugin.lookup(**kwargs)
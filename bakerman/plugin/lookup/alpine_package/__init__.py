@@ -22,14 +22,50 @@
 #
 #
 
-import requests
-from bs4 import BeautifulSoup  # type: ignore
+from bakerman import httpclient
 from bakerman.helper import getLogger
 from bakerman.plugin.lookup import Skeleton
-from typing import Optional, Type
+import io
+import mmap
+import os
+import tarfile
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Type
 
 logger = getLogger("plugin:lookup:alpine_package")
 
+SETTINGS: Dict[str, Any] = {
+    # Either `web` to scrape pkgs.alpinelinux.org or `index` to use APKINDEX.
+    "source": "web",
+    "mirror": "https://dl-cdn.alpinelinux.org/alpine",
+    "index_dir": "/var/tmp/bakerman/apkindex",
+    "index_ttl": 3600,
+}
+
+_index_locks: Dict[str, threading.Lock] = {}
+_index_locks_lock = threading.Lock()
+
+
+def configure(**settings: Any) -> None:
+    """
+    Changes the settings of the Alpine package lookups.
+
+    Args:
+        source: `web` to scrape pkgs.alpinelinux.org or `index` to answer
+                lookups from the downloaded APKINDEX files.
+        mirror: The Alpine mirror to download APKINDEX files from.
+        index_dir: The directory storing the parsed APKINDEX files.
+        index_ttl: The number of seconds after which an index is refreshed.
+    """
+
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            raise TypeError("Unknown alpine_package setting '%s'" % (key))
+        if value is not None:
+            SETTINGS[key] = value
+
 
 def discovery(name: str) -> Optional[Type["AlpinePackage"]]:
     """
@@ -56,7 +92,12 @@ class AlpinePackage(Skeleton):
     """
 
     def lookup(
-        self, name: str, branch: str, repo: str = "main", arch: str = "x86_64"
+        self,
+        name: str,
+        branch: str,
+        repo: str = "main",
+        arch: str = "x86_64",
+        source: Optional[str] = None,
     ) -> Optional[str]:
         """
         Returns the latest package version off the package with name `name`.
@@ -66,13 +107,40 @@ class AlpinePackage(Skeleton):
             branch: The Alpine branch name
             repo: The Alpine repo name
             arch: The platform architecture
+            source: Overrides the configured lookup source. (web, index)
 
         Returns:
             A version number.
         """
 
-        logger.debug("Doing a lookup for %s" % (name))
-        response = requests.get(
+        logger.debug("Doing a lookup for %s", name)
+        if (source or SETTINGS["source"]) == "index":
+            return self.__lookupIndex(name, branch, repo, arch)
+        else:
+            return self.__lookupWeb(name, branch, repo, arch)
+
+    def prepare(self, variables: List[Dict]) -> None:
+        """
+        Makes sure each APKINDEX required by the upcoming index lookups is
+        downloaded only once.
+
+        Args:
+            variables: The keyword arguments of all upcoming lookups.
+        """
+
+        for item in variables:
+            if (item.get("source") or SETTINGS["source"]) == "index":
+                self.__indexFile(
+                    item["branch"], item.get("repo", "main"), item.get("arch", "x86_64")
+                )
+
+    def __lookupWeb(
+        self, name: str, branch: str, repo: str, arch: str
+    ) -> Optional[str]:
+
+        from bs4 import BeautifulSoup  # type: ignore
+
+        response = httpclient.get(
             f"https://pkgs.alpinelinux.org/packages?name={name}&branch={branch}&repo={repo}&arch={arch}"
         )
 
@@ -82,3 +150,67 @@ class AlpinePackage(Skeleton):
             return item.text
 
         return None
+
+    def __lookupIndex(
+        self, name: str, branch: str, repo: str, arch: str
+    ) -> Optional[str]:
+
+        # The index file starts with a newline so each record, including the
+        # first one, can be found by searching for "\n<name>\t".
+        needle = b"\n" + name.encode() + b"\t"
+        with open(self.__indexFile(branch, repo, arch), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+                start = index.find(needle)
+                if start == -1:
+                    return None
+                start += len(needle)
+                return index[start : index.find(b"\n", start)].decode()
+
+    def __indexFile(self, branch: str, repo: str, arch: str) -> str:
+
+        filename = os.path.join(SETTINGS["index_dir"], branch, repo, f"{arch}.idx")
+        with _index_locks_lock:
+            lock = _index_locks.setdefault(filename, threading.Lock())
+
+        with lock:
+            try:
+                age = time.time() - os.stat(filename).st_mtime
+            except FileNotFoundError:
+                age = None
+            if age is None or age > SETTINGS["index_ttl"]:
+                self.__downloadIndex(branch, repo, arch, filename)
+        return filename
+
+    def __downloadIndex(self, branch: str, repo: str, arch: str, filename: str) -> None:
+
+        url = f"{SETTINGS['mirror']}/{branch}/{repo}/{arch}/APKINDEX.tar.gz"
+        logger.debug("Downloading %s", url)
+        response = httpclient.get(url)
+        response.raise_for_status()
+
+        with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as t:
+            member = t.extractfile("APKINDEX")
+            if member is None:
+                raise Exception(f"{url} does not contain an APKINDEX file.")
+            versions = self.__parseIndex(member)
+
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=os.path.dirname(filename))
+        with os.fdopen(fd, "w") as f:
+            f.write("\n")
+            for package in sorted(versions):
+                f.write(f"{package}\t{versions[package]}\n")
+        os.replace(path, filename)
+
+    def __parseIndex(self, content: io.BufferedReader) -> Dict[str, str]:
+
+        versions = {}
+        name = None
+        for line in io.TextIOWrapper(content, encoding="utf-8"):
+            if line.startswith("P:"):
+                name = line[2:].rstrip("\n")
+            elif line.startswith("V:") and name is not None:
+                versions.setdefault(name, line[2:].rstrip("\n"))
+            elif line == "\n":
+                name = None
+        return versions
@@ -23,14 +23,32 @@
 #
 
 from bakerman.helper import getLogger
-import requests
-import sys
-import semver  # type: ignore
-from functools import cmp_to_key
-from typing import Optional, Type
+from bakerman.plugin.lookup import Skeleton
+from bakerman import httpclient
+from bakerman.errors import LookupFailed
+import threading
+import time
+from bakerman.version import latestVersion, versionKey
+from typing import Dict, Iterator, List, Optional, Tuple, Type
 
 logger = getLogger("plugin:lookup:docker_hub")
 
+AUTH_URL = "https://auth.docker.io"
+REGISTRY_URL = "https://index.docker.io"
+HUB_URL = "https://hub.docker.com"
+
+# The number of tags requested per page.
+PAGE_SIZE = 1000
+HUB_PAGE_SIZE = 100
+
+# The maximum number of scopes requested in a single token request.
+MAX_TOKEN_SCOPES = 50
+
+# Bearer tokens per scope and the timestamp after which they can't be used
+# anymore.  Shared by all `DockerHub` instances of the process.
+_tokens: Dict[str, Tuple[str, float]] = {}
+_tokens_lock = threading.Lock()
+
 
 def discovery(name: str) -> Optional[Type["DockerHub"]]:
     """
@@ -52,7 +70,7 @@ def discovery(name: str) -> Optional[Type["DockerHub"]]:
         return None
 
 
-class DockerHub:
+class DockerHub(Skeleton):
     """
     The Bakerman version lookup plugin for Docker Hub docker images. This
     plugins does make a naive assumption that containers are always versioned
@@ -60,53 +78,127 @@ class DockerHub:
     A better implementation is welcome.
     """
 
-    def lookup(self, name) -> str:
+    def lookup(self, name: str, ordered: bool = False, stale_pages: int = 2) -> str:
         """
         Returns the latest available version off the container with name `name`.
 
         Args:
             name: The name of the package to lookup the latest available version.
+            ordered: When `True` the Docker Hub tags API is used which returns
+                     the most recently updated tags first.  Paging stops once
+                     `stale_pages` consecutive pages didn't contain a tag
+                     newer than the best one found so far.  This is a lot
+                     cheaper for images with thousands of tags but assumes
+                     new versions are never pushed before older ones.
+            stale_pages: The number of pages without a better tag after which
+                         an `ordered` lookup stops paging.
 
         Returns:
             A version number.
         """
 
-        token = self.__getToken(None, None, name)
+        if ordered:
+            latest_tag = self.__getLatestOrderedTag(name, stale_pages)
+        else:
+            latest_tag = latestVersion(self.__iterRegistryTags(name))
+        logger.debug("The latest tag for '%s' is '%s'", name, latest_tag)
+        return latest_tag
 
-        headers = {"Authorization": f"Bearer {token}"}
-        r = requests.get(
-            f"https://index.docker.io/v2/library/{name}/tags/list", headers=headers
-        )
+    def __iterRegistryTags(self, name: str) -> Iterator[str]:
+
+        headers = {"Authorization": f"Bearer {self.__getToken(name)}"}
+        url: Optional[str] = f"{REGISTRY_URL}/v2/library/{name}/tags/list?n={PAGE_SIZE}"
+        while url:
+            r = httpclient.get(url, headers=headers)
+            r.raise_for_status()
+            yield from r.json().get("tags") or []
+            # The registry returns a relative URL in the `Link` header.
+            if "next" in r.links:
+                url = REGISTRY_URL + r.links["next"]["url"]
+            else:
+                url = None
 
-        tags = self.__extractValidTags(r.json())
-        latest_tag = self.__getLatestTag(tags)
-        logger.debug(f"The latest tag for '{name}' is '{latest_tag}'")
-        return latest_tag
+    def __getLatestOrderedTag(self, name: str, stale_pages: int) -> Optional[str]:
 
-    def __extractValidTags(self, data):
-        valid_tags = []
-        for tag in data["tags"]:
-            try:
-                semver.parse(tag)
-            except Exception:
-                pass
+        url: Optional[str] = (
+            f"{HUB_URL}/v2/repositories/library/{name}/tags"
+            f"?page_size={HUB_PAGE_SIZE}&ordering=last_updated"
+        )
+        latest_tag = None
+        latest_key = None
+        stale = 0
+        while url and stale < stale_pages:
+            r = httpclient.get(url)
+            r.raise_for_status()
+            data = r.json()
+            candidate = latestVersion(tag["name"] for tag in data["results"])
+            key = versionKey(candidate) if candidate else None
+            if key and (latest_key is None or key > latest_key):
+                latest_tag = candidate
+                latest_key = key
+                stale = 0
             else:
-                valid_tags.append(tag)
-        logger.debug(f"Valid tags are {valid_tags}")
-        return valid_tags
+                stale += 1
+            url = data.get("next")
+        return latest_tag
+
+    def prepare(self, variables: List[Dict]) -> None:
+        """
+        Fetches bearer tokens covering all images which are going to be
+        looked up using as few token requests as possible.
 
-    def __getLatestTag(self, tags):
-        return sorted(tags, key=cmp_to_key(semver.compare))[-1]
+        Args:
+            variables: The keyword arguments of all upcoming lookups.
+        """
+
+        scopes = []
+        for item in variables:
+            if item.get("ordered"):
+                # The Docker Hub tags API doesn't require a token.
+                continue
+            scope = self.__scope(item["name"])
+            if self.__cachedToken(scope) is None and scope not in scopes:
+                scopes.append(scope)
+
+        for index in range(0, len(scopes), MAX_TOKEN_SCOPES):
+            self.__requestToken(scopes[index : index + MAX_TOKEN_SCOPES])
+
+    def __getToken(self, image: str) -> str:
+
+        scope = self.__scope(image)
+        token = self.__cachedToken(scope)
+        if token is None:
+            token = self.__requestToken([scope])
+        return token
+
+    def __scope(self, image: str) -> str:
+
+        return f"repository:library/{image}:pull"
+
+    def __cachedToken(self, scope: str) -> Optional[str]:
+
+        with _tokens_lock:
+            token = _tokens.get(scope)
+        if token and token[1] > time.time():
+            return token[0]
+        return None
 
-    def __getToken(self, username, token, image, auth_url="https://auth.docker.io"):
+    def __requestToken(self, scopes: List[str], auth_url: str = AUTH_URL) -> str:
 
-        payload = {
-            "service": "registry.docker.io",
-            "scope": f"repository:library/{image}:pull",
-        }
+        payload = {"service": "registry.docker.io", "scope": scopes}
 
-        r = requests.get(auth_url + "/token", params=payload)
+        r = httpclient.get(auth_url + "/token", params=payload)
         if not r.status_code == 200:
-            logger.error(f"Unable to authenticate to {auth_url}. Reason: {r.text}")
-            sys.exit(1)
-        return r.json()["token"]
+            raise LookupFailed(
+                f"Unable to authenticate to {auth_url}. Reason: {r.text}"
+            )
+
+        data = r.json()
+        token = data["token"]
+        # Keep a margin so a token doesn't expire between lookup and request.
+        expires = time.time() + data.get("expires_in", 60) - 10
+        with _tokens_lock:
+            for scope in scopes:
+                _tokens[scope] = (token, expires)
+        logger.debug("Received a token for %s scope(s).", len(scopes))
+        return token
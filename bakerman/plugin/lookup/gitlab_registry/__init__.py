@@ -23,13 +23,27 @@
 #
 
 from bakerman.helper import getLogger
-import requests
-import semver  # type: ignore
-from functools import cmp_to_key
-from typing import Optional, Type
+from bakerman.plugin.lookup import Skeleton
+from bakerman import httpclient
+from bakerman.errors import LookupFailed
+from bakerman.version import latestVersion
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple, Type
 
 logger = getLogger("plugin:lookup:gitlab_registry")
 
+# The maximum number of items Gitlab returns per page.
+PER_PAGE = 100
+
+# The maximum number of pages fetched concurrently.
+PAGE_WORKERS = 4
+
+# Registry IDs per (host, project_id, path).  Shared by all `GitlabRegistry`
+# instances of the process.
+_registry_ids: Dict[Tuple[str, int, str], int] = {}
+_registry_ids_lock = threading.Lock()
+
 
 def discovery(name: str) -> Optional[Type["GitlabRegistry"]]:
     """
@@ -51,7 +65,7 @@ def discovery(name: str) -> Optional[Type["GitlabRegistry"]]:
         return None
 
 
-class GitlabRegistry:
+class GitlabRegistry(Skeleton):
     """
     The Bakerman version lookup plugin for Gitlab registry Docker images. This
     plugin does make a naive assumption that containers are always versioned
@@ -74,57 +88,104 @@ class GitlabRegistry:
         Returns:
             A version number.
         """
-        registry_id = self.__getRegistryID(host, project_id, path, token)
-
-        if token:
-            r = requests.get(
-                f"https://{host}/api/v4/projects/{project_id}/registry/repositories/{registry_id}/tags",
-                headers={"PRIVATE-TOKEN": token},
-            )
+        import requests
+
+        key = (host, project_id, path)
+        with _registry_ids_lock:
+            registry_id = _registry_ids.get(key)
+        if registry_id is None:
+            registry_id = self.__getRegistryID(host, project_id, path, token)
+            latest_tag = self.__latestTag(host, project_id, registry_id, token)
         else:
-            r = requests.get(
-                f"https://{host}/api/v4/projects/{project_id}/registry/repositories/{registry_id}/tags",
-            )
-        r.raise_for_status()
-        tags = self.__extractValidTags(r.json())
-        latest_tag = self.__getLatestTag(tags)
-        logger.debug(f"The latest tag for '{path}' is '{latest_tag}'")
-        return latest_tag
-
-    def __extractValidTags(self, data):
-        valid_tags = []
-
-        for tag in data:
             try:
-                semver.parse(tag["name"])
-            except Exception:
-                pass
-            else:
-                valid_tags.append(tag["name"])
-        logger.debug(f"Valid tags are {valid_tags}")
-        return valid_tags
+                latest_tag = self.__latestTag(host, project_id, registry_id, token)
+            except requests.HTTPError as err:
+                if err.response is None or err.response.status_code != 404:
+                    raise
+                # The registry has been deleted or re-created since its ID was
+                # cached.
+                logger.debug(
+                    "Registry ID %s of '%s' is gone. Resolving it again.",
+                    registry_id,
+                    path,
+                )
+                with _registry_ids_lock:
+                    if _registry_ids.get(key) == registry_id:
+                        del _registry_ids[key]
+                registry_id = self.__getRegistryID(host, project_id, path, token)
+                latest_tag = self.__latestTag(host, project_id, registry_id, token)
+
+        logger.debug("The latest tag for '%s' is '%s'", path, latest_tag)
+        return latest_tag
 
-    def __getLatestTag(self, tags):
-        return sorted(tags, key=cmp_to_key(semver.compare))[-1]
+    def __latestTag(
+        self, host: str, project_id: int, registry_id: int, token: Optional[str]
+    ) -> str:
 
-    def __getRegistryID(self, host, project_id, path, token):
+        tags = self.__iterPages(
+            f"https://{host}/api/v4/projects/{project_id}/registry/repositories/{registry_id}/tags",
+            token,
+        )
+        return latestVersion(tag["name"] for tag in tags)
+
+    def __getRegistryID(
+        self, host: str, project_id: int, path: str, token: Optional[str]
+    ) -> int:
+
+        registry_id = None
+        for item in self.__iterPages(
+            f"https://{host}/api/v4/projects/{project_id}/registry/repositories",
+            token,
+        ):
+            # Cache all registries of the project as other lookups are likely
+            # to need them too.
+            with _registry_ids_lock:
+                _registry_ids[(host, project_id, item["path"])] = item["id"]
+            if item["path"] == path:
+                registry_id = item["id"]
 
-        if token:
-            r = requests.get(
-                f"https://{host}/api/v4/projects/{project_id}/registry/repositories",
-                headers={"PRIVATE-TOKEN": token},
-            )
-        else:
-            r = requests.get(
-                f"https://{host}/api/v4/projects/{project_id}/registry/repositories"
+        if registry_id is None:
+            raise LookupFailed(
+                f"No Gitlab repository for project {project_id} with path {path}"
             )
+        return registry_id
 
-        r.raise_for_status()
+    def __iterPages(self, url: str, token: Optional[str]) -> Iterator[Dict]:
+        """
+        Yields the items of all pages of a Gitlab API collection.  When Gitlab
+        reports the total number of pages the remaining pages are fetched
+        concurrently, otherwise the next page links are followed.
+        """
 
-        for item in r.json():
-            if item["path"] == path:
-                return item["id"]
+        headers = {"PRIVATE-TOKEN": token} if token else {}
+
+        r = self.__getPage(url, headers, 1)
+        yield from r.json()
+
+        total_pages = int(r.headers.get("X-Total-Pages") or 0)
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+                pages = executor.map(
+                    lambda page: self.__getPage(url, headers, page).json(),
+                    range(2, total_pages + 1),
+                )
+                for items in pages:
+                    yield from items
+            return
+
+        # Gitlab omits X-Total-Pages for large collections.
+        while r.headers.get("X-Next-Page") or "next" in r.links:
+            if r.headers.get("X-Next-Page"):
+                r = self.__getPage(url, headers, int(r.headers["X-Next-Page"]))
+            else:
+                r = httpclient.get(r.links["next"]["url"], headers=headers)
+                r.raise_for_status()
+            yield from r.json()
+
+    def __getPage(self, url: str, headers: Dict, page: int):
 
-        raise Exception(
-            f"No Gitlab repository for project {project_id} with path {path}"
+        r = httpclient.get(
+            url, headers=headers, params={"per_page": PER_PAGE, "page": page}
         )
+        r.raise_for_status()
+        return r
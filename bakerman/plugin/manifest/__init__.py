@@ -24,6 +24,164 @@
 
 from . import *
 import sys
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+class Value:
+    """
+    A single template variable of a manifest entry.
+
+    Args:
+        template_arg_name: The name of the variable in the template.
+        current_value: The value the variable currently has.
+        variables: The arguments of the lookup.
+        locked: When true the current value is kept. `None` when the manifest
+                doesn't define it.
+        extra: Any other keys of the value.
+    """
+
+    __slots__ = ("template_arg_name", "current_value", "variables", "locked", "extra")
+
+    def __init__(
+        self,
+        template_arg_name: str,
+        current_value: Optional[str],
+        variables: Dict,
+        locked: Optional[bool] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.template_arg_name = template_arg_name
+        self.current_value = current_value
+        self.variables = variables
+        self.locked = locked
+        self.extra = extra
+
+
+class Entry:
+    """
+    A manifest entry grouping the values looked up using the same type.
+
+    Args:
+        type: The lookup type.
+        values: The `Value` instances of the entry.
+        extra: Any other keys of the entry.
+        source: The file the entry is stored in when the manifest is split
+                over multiple files.
+    """
+
+    __slots__ = ("type", "values", "extra", "source")
+
+    def __init__(
+        self,
+        type: str,
+        values: List[Value],
+        extra: Optional[Dict[str, Any]] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        self.type = type
+        self.values = values
+        self.extra = extra
+        self.source = source
+
+
+class Manifest:
+    """
+    The content of a manifest with an index of its values by template
+    variable name.  `changed` contains the source of each entry containing
+    an updated value.
+
+    Args:
+        entries: The `Entry` instances of the manifest.
+    """
+
+    __slots__ = ("entries", "index", "changed")
+
+    def __init__(self, entries: List[Entry]) -> None:
+        self.entries = entries
+        self.changed: Set[Optional[str]] = set()
+        self.index: Dict[str, List[Tuple[Entry, Value]]] = {}
+        for entry in entries:
+            for value in entry.values:
+                self.index.setdefault(value.template_arg_name, []).append(
+                    (entry, value)
+                )
+
+    def __iter__(self) -> Iterator[Entry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def fromData(cls, data: List[Dict], source: Optional[str] = None) -> "Manifest":
+        """
+        Creates a manifest from its JSON compatible representation.
+
+        Args:
+            data: The list of manifest entries.
+            source: The file the entries are stored in.
+        """
+
+        entries = []
+        for item in data:
+            item = dict(item)
+            values = []
+            for value in item.pop("values"):
+                value = dict(value)
+                values.append(
+                    Value(
+                        value.pop("template_arg_name"),
+                        value.pop("current_value", None),
+                        value.pop("variables", {}),
+                        value.pop("locked", None),
+                        value or None,
+                    )
+                )
+            entries.append(Entry(item.pop("type"), values, item or None, source))
+        return cls(entries)
+
+    def toData(self) -> List[Dict]:
+        """
+        Returns the JSON compatible representation of the manifest.
+        """
+
+        data = []
+        for entry in self.entries:
+            values = []
+            for value in entry.values:
+                item = dict(value.extra or {})
+                item["template_arg_name"] = value.template_arg_name
+                item["current_value"] = value.current_value
+                item["variables"] = value.variables
+                if value.locked is not None:
+                    item["locked"] = value.locked
+                values.append(item)
+            item = dict(entry.extra or {})
+            item["type"] = entry.type
+            item["values"] = values
+            data.append(item)
+        return data
+
+    def updateVariables(self, variables: Dict[str, str]) -> Dict[str, str]:
+        """
+        Updates the current value of the unlocked template variables.
+
+        Args:
+            variables: The new value of each template variable.
+
+        Returns:
+            The template variables which have been updated and their value.
+        """
+
+        changed = {}
+        for name, new in variables.items():
+            for entry, value in self.index.get(name, ()):
+                if not value.locked and value.current_value != new:
+                    value.current_value = new
+                    changed[name] = new
+                    self.changed.add(entry.source)
+                    break
+        return changed
 
 
 class Skeleton:
@@ -43,6 +201,23 @@ class Skeleton:
             % (sys._getframe().f_code.co_name, self.__class__)
         )
 
+    def updateVariables(self, variables: Dict[str, str]) -> Dict[str, str]:
+        """
+        Updates the value of multiple variables.
+
+        Args:
+            variables: The new value of each template variable.
+
+        Returns:
+            The template variables which have been updated and their value.
+        """
+
+        return {
+            name: value
+            for name, value in variables.items()
+            if self.updateVariable(name, value)
+        }
+
     def write(self):
         raise NotImplementedError(
             "`%s` method not implemented by `%s` plugin."
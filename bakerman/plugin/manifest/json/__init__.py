@@ -22,15 +22,131 @@
 #
 #
 
+import glob
 import json
-from bakerman.plugin.manifest import Skeleton
+import os
+from bakerman.plugin.manifest import Manifest, Skeleton
 from bakerman.helper import getLogger
-from typing import List, Dict, Optional, Type
+from typing import Any, List, Dict, Optional, Tuple, Type
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
 
 logger = getLogger("plugin:manifest:json")
 
 
+def loads(data: bytes) -> Any:
+    """
+    Decodes a JSON document using `orjson` when it's installed.
+
+    Args:
+        data: The JSON document.
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any) -> str:
+    """
+    Encodes `data` the way manifests are written: sorted keys and indented
+    by 2 spaces.  Uses `orjson` when it's installed.
+
+    Args:
+        data: The data to encode.
+    """
+
+    # `orjson` formats floats differently (`1e20`, `NaN`) and rejects integers
+    # above 64 bits and non string keys.  Keep the output identical to avoid
+    # changing existing manifests.
+    if orjson is not None and not _containsFloat(data):
+        try:
+            result = orjson.dumps(
+                data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+            )
+        except TypeError:
+            pass
+        else:
+            # `json` escapes non ASCII characters and `orjson` doesn't.
+            if result.isascii():
+                return result.decode("utf-8")
+    return json.dumps(data, sort_keys=True, indent=2)
+
+
+def _containsFloat(data: Any) -> bool:
+
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if type(item) is dict:
+            stack.extend(item.values())
+        elif type(item) is list:
+            stack.extend(item)
+        elif isinstance(item, float):
+            return True
+    return False
+
+
+def shardFiles(workdir: str, filename: str) -> Tuple[Optional[List[str]], Any]:
+    """
+    Returns the shard files of a manifest which is split over multiple files
+    or the decoded content when `filename` is a regular manifest so it
+    doesn't need to be parsed again.
+
+    A manifest is split when `filename` is a directory, in which case each
+    `*.json` file in it is a shard, or when it contains an object with an
+    `include` list.  Each include is a file, a directory or a glob pattern
+    relative to the directory of `filename`.
+
+    Arguments:
+        workdir: The directory containing the manifest.
+        filename: The file name of the manifest.
+
+    Returns:
+        A tuple containing the shard file names relative to `workdir` in
+        sorted order or `None` and the decoded content of a regular manifest
+        or `None`.
+
+    Raises:
+        FileNotFoundError: An include doesn't exist or the manifest doesn't
+                           resolve to any shard file.
+    """
+
+    path = os.path.join(workdir, filename)
+    if os.path.isdir(path):
+        includes = [filename]
+        base = ""
+    else:
+        with open(path, "rb") as f:
+            data = loads(f.read())
+        if not isinstance(data, dict):
+            return None, data
+        includes = data["include"]
+        base = os.path.dirname(filename)
+
+    shards: List[str] = []
+    for include in includes:
+        include = os.path.normpath(os.path.join(base, include))
+        if os.path.isdir(os.path.join(workdir, include)):
+            include = os.path.join(include, "*.json")
+        matches = sorted(
+            os.path.relpath(match, workdir)
+            for match in glob.glob(os.path.join(workdir, include))
+        )
+        if not matches and not glob.has_magic(include):
+            raise FileNotFoundError("Manifest shard '%s' does not exist." % (include))
+        shards += [match for match in matches if match not in shards]
+    if not shards:
+        # Most likely the shards haven't been checked out.
+        raise FileNotFoundError(
+            "Manifest '%s' does not resolve to any shard file." % (filename)
+        )
+    return shards, None
+
+
 def discovery(workdir: str, manifest: str) -> Optional[Type["JSON"]]:
     """
     Function expected by the `bakerman.handler.discoverLookupHandler` factory
@@ -45,18 +161,24 @@ def discovery(workdir: str, manifest: str) -> Optional[Type["JSON"]]:
         The `JSON` class or `None`
     """
 
+    # Shards are only resolved by `JSON.read()` so a missing shard is
+    # reported as such instead of as an unsupported manifest.
     try:
-        with open("%s/%s" % (workdir, manifest)) as j:
-            json.load(j)
+        if not os.path.isdir(os.path.join(workdir, manifest)):
+            with open(os.path.join(workdir, manifest), "rb") as j:
+                data = loads(j.read())
+            if isinstance(data, dict) and not isinstance(data.get("include"), list):
+                raise ValueError("A sharded manifest requires an 'include' list.")
     except Exception as err:
         logger.debug(
-            "%s/%s is not a valid JSON file. Reason: %s" % (workdir, manifest, err)
+            "%s/%s is not a valid JSON file. Reason: %s", workdir, manifest, err
         )
         return None
     else:
         logger.debug(
-            "%s/%s is a valid JSON file. Picking JSON as manifest handler."
-            % (workdir, manifest)
+            "%s/%s is a valid JSON file. Picking JSON as manifest handler.",
+            workdir,
+            manifest,
         )
         return JSON
 
@@ -74,10 +196,11 @@ class JSON(Skeleton):
 
         self.workdir = workdir
         self.filename = filename
-        self.__cache: List[Dict] = []
+        self.__cache = Manifest([])
         self.__changed = False
+        self.__shards: Optional[List[str]] = None
 
-    def read(self) -> List[Dict]:
+    def read(self) -> Manifest:
         """
         Reads and returns the content of the manifest file.
 
@@ -85,10 +208,18 @@ class JSON(Skeleton):
             The contente of the manifest file.
         """
 
-        with open(f"{self.workdir}/{self.filename}") as f:
-            self.__cache = json.load(f)
+        self.__shards, data = shardFiles(self.workdir, self.filename)
+        if self.__shards is None:
+            self.__cache = Manifest.fromData(data)
             return self.__cache
 
+        entries = []
+        for shard in self.__shards:
+            with open(f"{self.workdir}/{shard}", "rb") as f:
+                entries += Manifest.fromData(loads(f.read()), source=shard).entries
+        self.__cache = Manifest(entries)
+        return self.__cache
+
     def updateVariable(self, name: str, value: str) -> bool:
         """
         Updates the version of a variable.
@@ -101,26 +232,41 @@ class JSON(Skeleton):
             `True` when the value has been updated `False` if not.
         """
 
-        for index_1, item in enumerate(self.__cache):
-            for index_2, variable in enumerate(item["values"]):
-                if (
-                    name == variable["template_arg_name"]
-                    and value != variable["current_value"]
-                    and not variable["locked"]
-                ):
-                    self.__cache[index_1]["values"][index_2]["current_value"] = value
-                    self.__changed = True
-                    return True
-        return False
+        return bool(self.updateVariables({name: value}))
+
+    def updateVariables(self, variables: Dict[str, str]) -> Dict[str, str]:
+        """
+        Updates the version of multiple variables in a single pass.
+
+        Arguments:
+            variables: The new value of each template variable.
+
+        Returns:
+            The template variables which have been updated and their value.
+        """
+
+        changed = self.__cache.updateVariables(variables)
+        if changed:
+            self.__changed = True
+        return changed
 
     def write(self) -> bool:
         """
         Write the updated version of the manifest back to disk.
         """
-        if self.__changed is True:
+        if self.__changed is True and self.__shards is not None:
+            # Only rewrite the shards containing an updated value.
+            for shard in self.__shards:
+                if shard in self.__cache.changed:
+                    logger.debug("Manifest shard %s has changed. Writing it.", shard)
+                    entries = [e for e in self.__cache if e.source == shard]
+                    with open(f"{self.workdir}/{shard}", "w") as f:
+                        f.write(dumps(Manifest(entries).toData()))
+            return True
+        elif self.__changed is True:
             logger.debug("The manifest has changed. Writing differences.")
             with open(f"{self.workdir}/{self.filename}", "w") as f:
-                f.write(json.dumps(self.__cache, sort_keys=True, indent=2))
+                f.write(dumps(self.__cache.toData()))
             return True
         else:
             logger.debug("The manifest has not changed.")
@@ -22,8 +22,11 @@
 #
 #
 
+import hashlib
+import os
 import sys
-from typing import Dict
+import uuid
+from typing import Dict, Iterable
 
 
 class Skeleton:
@@ -36,14 +39,78 @@ class Skeleton:
         self.template = template
         self.target = target
 
-    def render(self, kwargs: Dict) -> None:
+    def render(self, kwargs: Dict) -> bool:
         """
         Renders the defined template using the provided `kwargs`.
 
         Args:
             kwargs: A dictionary of key/values used to render the template.
+
+        Returns:
+            True when the content of the target file has changed.
         """
         raise NotImplementedError(
             "`%s` method not implemented by `%s` plugin."
             % (sys._getframe().f_code.co_name, self.__class__)
         )
+
+    def writeTarget(self, chunks: Iterable[str]) -> bool:
+        """
+        Writes the rendered `chunks` to a temporary file which atomically
+        replaces the target file unless the content hasn't changed.
+
+        Args:
+            chunks: The rendered content.
+
+        Returns:
+            True when the content of the target file has changed.
+        """
+
+        filename = os.path.join(self.workdir, self.target)
+        temporary = os.path.join(
+            os.path.dirname(filename),
+            ".%s.%s.tmp" % (os.path.basename(filename), uuid.uuid4().hex),
+        )
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        digest = hashlib.sha256()
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    f.write(data)
+
+            if fileDigest(filename) == digest.digest():
+                os.remove(temporary)
+                return False
+
+            try:
+                os.chmod(temporary, os.stat(filename).st_mode)
+            except FileNotFoundError:
+                pass
+            os.replace(temporary, filename)
+            return True
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+
+def fileDigest(filename: str) -> bytes:
+    """
+    Returns the SHA256 digest of the content of `filename` or an empty value
+    when it doesn't exist.
+
+    Args:
+        filename: The file to digest.
+    """
+
+    digest = hashlib.sha256()
+    try:
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return b""
+    return digest.digest()
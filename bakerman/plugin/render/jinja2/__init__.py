@@ -22,13 +22,83 @@
 #
 #
 
-import jinja2
+import os
+import threading
 from bakerman.helper import getLogger
 from bakerman.plugin.render import Skeleton
-from typing import Type, Optional, Dict
+from typing import TYPE_CHECKING, Any, Type, Optional, Dict
+
+# `jinja2` is imported when the first environment is created so the settings
+# can be applied without paying for the import on runs which don't render.
+if TYPE_CHECKING:
+    import jinja2
 
 logger = getLogger("plugin:render:jinja2")
 
+SETTINGS: Dict[str, Any] = {
+    # The directory storing compiled templates across processes or `None`.
+    "bytecode_cache": None,
+    # Write the output while rendering instead of rendering it into memory.
+    "stream": False,
+}
+
+# One long lived environment per template directory.  Each environment keeps
+# the compiled templates in memory and recompiles them when their mtime
+# changes.
+_environments: Dict[str, "jinja2.Environment"] = {}
+_environments_lock = threading.Lock()
+
+
+def configure(**settings: Any) -> None:
+    """
+    Changes the settings of the Jinja2 render plugin.
+
+    Args:
+        bytecode_cache: The directory in which compiled templates are stored
+                        so other processes don't need to compile them again.
+        stream: Write the rendered output in chunks while rendering so the
+                memory usage doesn't depend on the size of the output.
+    """
+
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            raise TypeError("Unknown jinja2 setting '%s'" % (key))
+        SETTINGS[key] = value
+    with _environments_lock:
+        _environments.clear()
+
+
+def getEnvironment(directory: str) -> "jinja2.Environment":
+    """
+    Returns the environment loading templates from `directory`.
+
+    Args:
+        directory: The directory containing the templates.
+
+    Returns:
+        A `jinja2.Environment` instance.
+    """
+
+    directory = os.path.abspath(directory)
+    with _environments_lock:
+        env = _environments.get(directory)
+        if env is None:
+            import jinja2
+
+            bytecode_cache = None
+            if SETTINGS["bytecode_cache"]:
+                os.makedirs(SETTINGS["bytecode_cache"], exist_ok=True)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(
+                    SETTINGS["bytecode_cache"]
+                )
+            env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(directory),
+                auto_reload=True,
+                bytecode_cache=bytecode_cache,
+            )
+            _environments[directory] = env
+        return env
+
 
 def discovery(workdir: str, filename: str) -> Optional[Type["Jinja2"]]:
     """
@@ -44,20 +114,22 @@ def discovery(workdir: str, filename: str) -> Optional[Type["Jinja2"]]:
         The the `Jinja2` class or None.
     """
 
-    env = jinja2.Environment()
+    # The compiled template is kept by the environment for rendering.
     try:
-        with open("%s/%s" % (workdir, filename)) as t:
-            env.parse(t.read())
+        getEnvironment(workdir).get_template(filename)
     except Exception as err:
         logger.debug(
-            "%s/%s is not a valid jinja2 template. Reason: %s"
-            % (workdir, filename, err)
+            "%s/%s is not a valid jinja2 template. Reason: %s",
+            workdir,
+            filename,
+            err,
         )
         return None
     else:
         logger.debug(
-            "%s/%s is a valid jinja2 template. Picking Jinja2 as template renderer."
-            % (workdir, filename)
+            "%s/%s is a valid jinja2 template. Picking Jinja2 as template renderer.",
+            workdir,
+            filename,
         )
         return Jinja2
 
@@ -77,9 +149,10 @@ class Jinja2(Skeleton):
         self.template = template
         self.target = target
 
-    def render(self, kwargs: Dict) -> None:
-        with open(f"{self.workdir}/{self.template}") as r:
-            template = jinja2.Template("".join(r.readlines()))
-            with open(f"{self.workdir}/{self.target}", "w") as w:
-                logger.debug(f"Writing {self.workdir}/{self.target}.")
-                w.write(template.render(**kwargs))
+    def render(self, kwargs: Dict) -> bool:
+        template = getEnvironment(self.workdir).get_template(self.template)
+        logger.debug("Writing %s/%s.", self.workdir, self.target)
+        if SETTINGS["stream"]:
+            return self.writeTarget(template.generate(**kwargs))
+        else:
+            return self.writeTarget([template.render(**kwargs)])
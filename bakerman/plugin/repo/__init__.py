@@ -30,9 +30,14 @@ logger = getLogger("plugin::repo")
 
 
 class Skeleton:
-    def __init__(self, workdir, uri=None):
+    def __init__(self, workdir, uri=None, **options):
         self.uri = uri
         self.workdir = os.path.abspath(workdir)
+        self.options = options
+        # The directory containing the files of the repository Bakerman reads
+        # and writes.  Plugins which don't check out a working tree point this
+        # elsewhere.
+        self.filesdir = self.workdir
 
         try:
             logger.info("Checking prerequisites")
@@ -45,6 +50,9 @@ class Skeleton:
 
         if self.checkValidRepo():
             logger.debug("%s is a valid repository." % (self.workdir))
+            if options.get("refresh"):
+                logger.debug("Refreshing %s." % (self.workdir))
+                self.refresh()
         elif uri:
             logger.debug("%s is a not a valid repository. Cloning." % (self.workdir))
             self.clone()
@@ -73,6 +81,22 @@ class Skeleton:
             % (sys._getframe().f_code.co_name, self.__class__)
         )
 
+    def refresh(self):
+        raise NotImplementedError(
+            "`%s` method not implemented by `%s` plugin."
+            % (sys._getframe().f_code.co_name, self.__class__)
+        )
+
+    @classmethod
+    def remoteRevision(cls, uri, workdir):
+        # Optional.  The revision of the upstream repository without cloning
+        # it or `None` when unknown.
+        return None
+
+    def revision(self):
+        # Optional.  The revision the repository is at or `None` when unknown.
+        return None
+
     def commit(self, message):
         raise NotImplementedError(
             "`%s` method not implemented by `%s` plugin."
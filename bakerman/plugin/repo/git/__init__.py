@@ -24,15 +24,24 @@
 
 from bakerman.plugin.repo import Skeleton
 from bakerman.helper import getLogger
-from typing import Type, Optional
+from typing import Any, Dict, List, Type, Optional
 from git import Repo  # type: ignore
-from git.repo.base import Repo as RRepo  # type: ignore
-import semver  # type: ignore
+from bakerman.version import bumpMinor, latestVersion
+import fcntl
 import git
-
+import os
+import re
+import shutil
+import tempfile
+import threading
 
 logger = getLogger("plugin:repo:git")
 
+# Serializes the threads of this process updating the same reference mirror.
+# Other processes are kept out using `flock`.
+_mirror_locks: Dict[str, threading.Lock] = {}
+_mirror_locks_lock = threading.Lock()
+
 
 def discovery(uri: str, workdir: str) -> Optional[Type["Git"]]:
     """
@@ -57,16 +66,31 @@ def discovery(uri: str, workdir: str) -> Optional[Type["Git"]]:
 
 
 class Git(Skeleton):
-    def __init__(self, uri: str, workdir: str) -> None:
+    def __init__(self, uri: str, workdir: str, **options: Any) -> None:
         """
         The Bakerman CVS plugin handler for Git.
 
         Arguments:
             uri: The Git based repo URI
             workdir: The directory containing the repo
+            depth: Create a shallow clone with a history truncated to this
+                   number of commits.
+            filter: The object filter of a partial clone such as `blob:none`.
+            paths: The paths of the files Bakerman reads and writes.
+            sparse: Only check out `paths`.
+            bare: Clone a bare repository. Only `paths` are extracted from
+                  HEAD into a staging directory and commits are created
+                  without a working tree.
+            refresh: Fetch and fast-forward an existing repository.
+            reference_dir: The directory containing the bare mirrors whose
+                           objects are shared by all clones of a URI.
         """
 
-        Skeleton.__init__(self, uri=uri, workdir=workdir)
+        Skeleton.__init__(self, uri=uri, workdir=workdir, **options)
+
+        if Repo(self.workdir).bare:
+            self.filesdir = os.path.join(self.workdir, "bakerman-stage")
+            self.__stage()
 
     def checkPrerequisits(self) -> None:
         """
@@ -87,18 +111,207 @@ class Git(Skeleton):
 
     def clone(self) -> None:
 
-        RRepo.clone_from(self.uri, self.workdir)
+        args = []
+        if self.options.get("depth"):
+            args += ["--depth", str(self.options["depth"])]
+        if self.options.get("filter"):
+            args += ["--filter", self.options["filter"]]
+        if self.options.get("bare"):
+            args += ["--bare"]
+        elif self.options.get("sparse"):
+            args += ["--no-checkout"]
+        if self.options.get("reference_dir"):
+            args += ["--reference", self.__updateMirror(self.uri)]
+
+        git.cmd.Git().clone(args + [self.uri, self.workdir])
+        logger.debug(f"Cloned {self.uri} with options {args}.")
+
+        if self.options.get("sparse") and not self.options.get("bare"):
+            self.__checkoutSparse(self.options["paths"])
+
+        return None
+
+    def refresh(self) -> None:
+
+        g = git.cmd.Git(self.workdir)
+        if self.options.get("reference_dir"):
+            # Fetch the new objects into the mirror first so they are shared
+            # and the fetch below only needs to update the refs.
+            self.__updateMirror(self.uri or g.remote(["get-url", "origin"]))
+        args = ["origin"]
+        if self.options.get("depth"):
+            args = ["--depth", str(self.options["depth"])] + args
+        # Local tags which never made it upstream, such as the tag of a
+        # rejected push, are removed so they are not incremented again.
+        args = ["--prune", "--prune-tags"] + args
+        if g.rev_parse(["--is-bare-repository"]) == "true":
+            # A bare clone has no remote tracking branches.  Update its
+            # branches directly, discarding commits of a rejected push.
+            g.fetch(args + ["+refs/heads/*:refs/heads/*", "refs/tags/*:refs/tags/*"])
+            logger.debug(f"Refreshed {self.workdir} from its upstream.")
+            return None
+        g.fetch(args)
+        if g.rev_parse(["--is-shallow-repository"]) == "true":
+            # The truncated history can't be merged so move to the fetched
+            # commit.  This keeps uncommitted changes and fails on conflicts.
+            g.reset(["--keep", "@{upstream}"])
+        else:
+            try:
+                g.merge(["--ff-only", "@{upstream}"])
+            except git.exc.GitCommandError:
+                # The commit of a rejected push diverged from the upstream.
+                logger.warning(
+                    "%s diverged from its upstream. Discarding the local commits.",
+                    self.workdir,
+                )
+                g.reset(["--keep", "@{upstream}"])
+        logger.debug(f"Refreshed {self.workdir} from its upstream.")
+
         return None
 
+    @classmethod
+    def remoteRevision(cls, uri: Optional[str], workdir: str) -> Optional[str]:
+
+        if uri is None:
+            uri = git.cmd.Git(workdir).remote(["get-url", "origin"])
+        refs = git.cmd.Git().ls_remote([uri, "HEAD"])
+        return refs.split()[0] if refs else None
+
+    def revision(self) -> Optional[str]:
+
+        return git.cmd.Git(self.workdir).rev_parse(["HEAD"])
+
+    def __updateMirror(self, uri: str) -> str:
+
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", uri)
+        if not name.endswith(".git"):
+            name += ".git"
+        path = os.path.join(os.path.abspath(self.options["reference_dir"]), name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with _mirror_locks_lock:
+            lock = _mirror_locks.setdefault(path, threading.Lock())
+        with lock, open(path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.path.isdir(path):
+                    git.cmd.Git(path).fetch(["origin"])
+                    logger.debug(f"Updated reference mirror {path}.")
+                else:
+                    git.cmd.Git().clone(["--mirror", uri, path])
+                    # Clones borrow objects from the mirror through
+                    # alternates so it must never drop objects.
+                    git.cmd.Git(path).config(["gc.auto", "0"])
+                    logger.debug(f"Created reference mirror {path} of {uri}.")
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return path
+
+    def __checkoutSparse(self, paths: List[str]) -> None:
+
+        # Use the plain sparse-checkout file instead of `git sparse-checkout`
+        # which isn't available on older git versions.
+        g = git.cmd.Git(self.workdir)
+        g.config(["core.sparseCheckout", "true"])
+        git_dir = g.rev_parse(["--git-dir"])
+        with open(
+            os.path.join(self.workdir, git_dir, "info", "sparse-checkout"), "w"
+        ) as f:
+            for path in paths:
+                f.write("/%s\n" % (path.lstrip("/")))
+        g.read_tree(["-mu", "HEAD"])
+        logger.debug(f"Checked out {paths} of {self.uri}.")
+
+    def __stage(self) -> None:
+
+        # Extract the files Bakerman needs straight from the object database.
+        # Their modes are kept to write them back with the same mode.
+        shutil.rmtree(self.filesdir, ignore_errors=True)
+        os.makedirs(self.filesdir)
+        self.__modes: Dict[str, int] = {}
+        tree = Repo(self.workdir).head.commit.tree
+        for path in self.options.get("paths") or []:
+            os.makedirs(
+                os.path.dirname(os.path.join(self.filesdir, path)), exist_ok=True
+            )
+            try:
+                item = tree / path
+            except KeyError:
+                continue
+            # A directory such as a sharded manifest is extracted entirely.
+            if item.type == "tree":
+                blobs = [blob for blob in item.traverse() if blob.type == "blob"]
+            else:
+                blobs = [item]
+            for blob in blobs:
+                filename = os.path.join(self.filesdir, blob.path)
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                with open(filename, "wb") as f:
+                    f.write(blob.data_stream.read())
+                self.__modes[blob.path] = blob.mode
+        logger.debug(f"Extracted {list(self.__modes)} into {self.filesdir}.")
+
+    def __commitBare(self, message: str) -> None:
+
+        g = git.cmd.Git(self.workdir)
+        paths = []
+        for path in self.options.get("paths") or []:
+            filename = os.path.join(self.filesdir, path)
+            if os.path.isdir(filename):
+                for directory, _, files in sorted(os.walk(filename)):
+                    paths += [
+                        os.path.relpath(os.path.join(directory, f), self.filesdir)
+                        for f in sorted(files)
+                    ]
+            elif os.path.isfile(filename):
+                paths.append(path)
+        blobs = g.hash_object(
+            ["-w", "--"] + [os.path.join(self.filesdir, path) for path in paths]
+        ).splitlines()
+
+        # Build the new tree in a temporary index based on HEAD so the files
+        # of the repository never need to be checked out.
+        fd, index = tempfile.mkstemp(dir=self.workdir, prefix="bakerman-index")
+        os.close(fd)
+        env = {"GIT_INDEX_FILE": index}
+        try:
+            g.read_tree(["HEAD"], env=env)
+            cacheinfo = []
+            for path, blob in zip(paths, blobs):
+                mode = "%o" % (self.__modes.get(path, 0o100644))
+                cacheinfo += ["--cacheinfo", f"{mode},{blob},{path}"]
+            g.update_index(["--add"] + cacheinfo, env=env)
+            tree = g.write_tree(env=env)
+        finally:
+            os.remove(index)
+
+        parent = g.rev_parse(["HEAD"])
+        commit = g.commit_tree([tree, "-p", parent, "-m", message])
+        g.update_ref(["-m", "bakerman: commit", "HEAD", commit, parent])
+        logger.debug(f"Committed changes as {commit} without a working tree.")
+
     def commit(self, message: str) -> None:
-        git.cmd.Git(self.workdir).commit(["-m", message, "-a"])
-        logger.debug(f"Committed changes.")
+        if self.filesdir == self.workdir:
+            # Targets rendered for the first time aren't tracked yet.
+            paths = [
+                path
+                for path in self.options.get("paths") or []
+                if os.path.exists(os.path.join(self.workdir, path))
+            ]
+            g = git.cmd.Git(self.workdir)
+            if paths:
+                g.add(["--"] + paths)
+            g.commit(["-m", message, "-a"])
+            logger.debug(f"Committed changes.")
+        else:
+            self.__commitBare(message)
         self.__addIncrementedTag()
 
         return None
 
     def push(self) -> None:
-        git.cmd.Git(self.workdir).push(["--tags", "origin", "master"])
+        # Atomic so the tag isn't published when the branch is rejected.
+        git.cmd.Git(self.workdir).push(["--atomic", "--tags", "origin", "master"])
         logger.debug(f"Pushing commit.")
         return None
 
@@ -108,7 +321,7 @@ class Git(Skeleton):
         if current_tag is None:
             tag = "1.0.0"
         else:
-            tag = semver.bump_minor(current_tag)
+            tag = bumpMinor(current_tag)
 
         git.cmd.Git(self.workdir).tag([tag])
 
@@ -118,7 +331,11 @@ class Git(Skeleton):
 
     def __getLatestTag(self) -> Optional[str]:
 
-        try:
-            return git.cmd.Git(self.workdir).describe(["--abbrev=0", "--tag"])
-        except git.exc.GitCommandError:
-            return None
+        g = git.cmd.Git(self.workdir)
+        if g.rev_parse(["--is-shallow-repository"]) == "true":
+            # A shallow clone lacks most tags so ask the remote instead.
+            refs = g.ls_remote(["--tags", "--refs", "origin"])
+            tags = [ref.split("refs/tags/", 1)[-1] for ref in refs.splitlines()]
+        else:
+            tags = g.tag(["--list", "--merged", "HEAD"]).splitlines()
+        return latestVersion(tags)
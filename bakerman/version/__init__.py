@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  __init__.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import semver  # type: ignore
+from typing import Iterable, Optional, Tuple
+
+# A version key is a tuple which sorts the same way as semver precedence:
+# (major, minor, patch, prerelease) where a release sorts after all of its
+# prereleases.
+VersionKey = Tuple[int, int, int, Tuple]
+
+RELEASE = (1,)
+
+
+def versionKey(tag: str) -> Optional[VersionKey]:
+    """
+    Parses `tag` into a key which can be compared with other version keys.
+
+    Args:
+        tag: The version string to parse.
+
+    Returns:
+        The version key or `None` when `tag` is not a valid semver version.
+    """
+
+    try:
+        version = semver.VersionInfo.parse(tag)
+    except (ValueError, TypeError):
+        return None
+
+    if version.prerelease is None:
+        return (version.major, version.minor, version.patch, RELEASE)
+
+    # Numeric identifiers always have lower precedence than alphanumeric
+    # identifiers and are compared numerically.
+    prerelease = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in version.prerelease.split(".")
+    )
+    return (version.major, version.minor, version.patch, (0, prerelease))
+
+
+def latestVersion(tags: Iterable[str]) -> Optional[str]:
+    """
+    Returns the highest semver version of `tags` in a single pass.  Tags which
+    aren't valid semver versions are ignored.
+
+    Args:
+        tags: The version strings to choose from.
+
+    Returns:
+        The highest version or `None` when `tags` contains no valid version.
+    """
+
+    latest_key = None
+    latest_tag = None
+    for tag in tags:
+        key = versionKey(tag)
+        if key is not None and (latest_key is None or key > latest_key):
+            latest_key = key
+            latest_tag = tag
+    return latest_tag
+
+
+def bumpMinor(tag: str) -> str:
+    """
+    Returns `tag` with its minor version incremented.
+
+    Args:
+        tag: A valid semver version string.
+
+    Returns:
+        The incremented version string.
+    """
+
+    version = semver.VersionInfo.parse(tag)
+    return f"{version.major}.{version.minor + 1}.0"
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_alpine.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Benchmarks the Alpine package lookups: scraping the recorded
+pkgs.alpinelinux.org page and answering lookups from an APKINDEX.
+"""
+
+import io
+import os
+import tarfile
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from conftest import Response, fixture
+
+from bakerman.plugin.lookup import alpine_package
+from bakerman.plugin.lookup.alpine_package import AlpinePackage
+
+# The number of packages in the synthetic APKINDEX, close to `main` of a
+# release branch.
+INDEX_SIZE = 5000
+
+
+def apkIndex(count: int) -> bytes:
+    """
+    Returns an APKINDEX.tar.gz containing `count` packages.
+
+    Args:
+        count: The number of packages.
+    """
+
+    records = []
+    for index in range(count):
+        records.append(
+            "C:Q1%s=\nP:package-%s\nV:1.%s.0-r0\nA:x86_64\nS:123456\nI:456789\n"
+            "T:Synthetic package %s\nU:https://alpinelinux.org\nL:MIT\n"
+            "o:package-%s\nm:Bench <bench@localhost>\nt:1700000000\n"
+            % ("A" * 27, index, index, index, index)
+        )
+    content = "\n".join(records).encode("utf-8") + b"\n"
+
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as t:
+        info = tarfile.TarInfo("APKINDEX")
+        info.size = len(content)
+        t.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+@pytest.fixture
+def settings(tmp_path: Any) -> Iterator[None]:
+
+    original = dict(alpine_package.SETTINGS)
+    alpine_package.configure(
+        mirror="https://mirror.invalid/alpine", index_dir=str(tmp_path)
+    )
+    yield
+    alpine_package.SETTINGS.update(original)
+
+
+def bench_lookupWeb(benchmark: Any, http: Callable[[str, Response], None]) -> None:
+
+    http(
+        "https://pkgs.alpinelinux.org/packages",
+        Response(fixture("alpine_packages.html")),
+    )
+    result = benchmark(AlpinePackage().lookup, "openssl", "v3.19", source="web")
+    assert result == "3.1.4-r5"
+
+
+def bench_downloadIndex(
+    benchmark: Any, http: Callable[[str, Response], None], settings: None
+) -> None:
+
+    http("https://mirror.invalid/alpine", Response(apkIndex(INDEX_SIZE)))
+    filename = os.path.join(alpine_package.SETTINGS["index_dir"], "x.idx")
+    benchmark(
+        AlpinePackage()._AlpinePackage__downloadIndex,
+        "v3.19",
+        "main",
+        "x86_64",
+        filename,
+    )
+    assert os.path.getsize(filename) > 0
+
+
+@pytest.mark.parametrize("name", ["package-0", "package-%s" % (INDEX_SIZE - 1)])
+def bench_lookupIndex(
+    benchmark: Any, http: Callable[[str, Response], None], settings: None, name: str
+) -> None:
+
+    http("https://mirror.invalid/alpine", Response(apkIndex(INDEX_SIZE)))
+    plugin = AlpinePackage()
+    plugin.prepare([{"branch": "v3.19", "source": "index"}])
+    result = benchmark(plugin.lookup, name, "v3.19", source="index")
+    assert result == "1.%s.0-r0" % (name.split("-")[1])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_handler.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Benchmarks the plugin discovery of `bakerman.handler`, both the first
+discovery of a process and the cached discoveries which follow.
+"""
+
+from typing import Any
+
+import pytest
+
+from bakerman import handler
+from bakerman.plugin.lookup.gitlab_registry import GitlabRegistry
+from bakerman.plugin.manifest.json import JSON
+from bakerman.plugin.render.jinja2 import Jinja2
+
+KINDS = ["repo", "render", "manifest", "lookup"]
+
+
+def clearRegistry() -> None:
+    handler._registry.clear()
+    handler._lookup_handlers.clear()
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def bench_getPlugins(benchmark: Any, kind: str) -> None:
+
+    plugins = benchmark.pedantic(
+        handler.getPlugins,
+        args=(kind,),
+        setup=clearRegistry,
+        rounds=100,
+    )
+    assert plugins
+
+
+def bench_getPluginsCached(benchmark: Any) -> None:
+
+    handler.getPlugins("lookup")
+    assert benchmark(handler.getPlugins, "lookup")
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "cached"])
+def bench_discoverLookupHandler(benchmark: Any, cached: bool) -> None:
+
+    handler.discoverLookupHandler("gitlab_registry")
+    assert (
+        benchmark.pedantic(
+            handler.discoverLookupHandler,
+            args=("gitlab_registry",),
+            setup=None if cached else handler._lookup_handlers.clear,
+            rounds=100,
+        )
+        is GitlabRegistry
+    )
+
+
+def bench_discoverManifestHandler(benchmark: Any, tmp_path: Any) -> None:
+
+    (tmp_path / "bakerman.manifest").write_text("[]")
+    assert (
+        benchmark(handler.discoverManifestHandler, str(tmp_path), "bakerman.manifest")
+        is JSON
+    )
+
+
+def bench_discoverRenderHandler(benchmark: Any, tmp_path: Any) -> None:
+
+    (tmp_path / "bakerman.template").write_text("{{ version }}\n")
+    assert (
+        benchmark(handler.discoverRenderHandler, str(tmp_path), "bakerman.template")
+        is Jinja2
+    )
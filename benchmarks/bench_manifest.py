@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_manifest.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Benchmarks reading, updating and writing JSON manifests of 10 to 10k
+variables.
+"""
+
+import itertools
+import json
+import os
+from typing import Any, Dict
+
+import pytest
+
+from bakerman.plugin.manifest.json import JSON
+
+SIZES = [10, 100, 1000, 10000]
+
+# The number of values of each manifest entry.
+ENTRY_SIZE = 10
+
+
+def writeManifest(workdir: str, count: int) -> Dict[str, str]:
+    """
+    Writes a manifest containing `count` variables to `workdir`.
+
+    Args:
+        workdir: The directory to write `bakerman.manifest` to.
+        count: The number of template variables.
+
+    Returns:
+        A new value for each template variable.
+    """
+
+    entries = []
+    for start in range(0, count, ENTRY_SIZE):
+        entries.append(
+            {
+                "type": "docker_hub",
+                "values": [
+                    {
+                        "template_arg_name": "var_%s" % (index),
+                        "current_value": "1.0.%s" % (index),
+                        "locked": index % 20 == 0,
+                        "variables": {"name": "image_%s" % (index)},
+                    }
+                    for index in range(start, min(start + ENTRY_SIZE, count))
+                ],
+            }
+        )
+    with open(os.path.join(workdir, "bakerman.manifest"), "w") as f:
+        json.dump(entries, f, indent=2)
+    return {"var_%s" % (index): "2.0.%s" % (index) for index in range(count)}
+
+
+def readManifest(workdir: str) -> JSON:
+
+    handler = JSON(workdir, "bakerman.manifest")
+    handler.read()
+    return handler
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_read(benchmark: Any, tmp_path: Any, count: int) -> None:
+
+    writeManifest(str(tmp_path), count)
+    handler = JSON(str(tmp_path), "bakerman.manifest")
+    assert len(benchmark(handler.read).index) == count
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_updateVariable(benchmark: Any, tmp_path: Any, count: int) -> None:
+
+    writeManifest(str(tmp_path), count)
+    handler = readManifest(str(tmp_path))
+    # Alternate the value so every round actually updates the manifest.
+    values = itertools.cycle(["2.0.0", "3.0.0"])
+    name = "var_%s" % (count - 1)
+    assert benchmark(lambda: handler.updateVariable(name, next(values)))
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_updateVariables(benchmark: Any, tmp_path: Any, count: int) -> None:
+
+    variables = writeManifest(str(tmp_path), count)
+    changed = benchmark.pedantic(
+        lambda handler: handler.updateVariables(variables),
+        setup=lambda: ((readManifest(str(tmp_path)),), {}),
+        rounds=10,
+    )
+    assert len(changed) == count - len(range(0, count, 20))
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_write(benchmark: Any, tmp_path: Any, count: int) -> None:
+
+    variables = writeManifest(str(tmp_path), count)
+    handler = readManifest(str(tmp_path))
+    handler.updateVariables(variables)
+    assert benchmark(handler.write)
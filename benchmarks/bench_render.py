@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_render.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Benchmarks compiling and rendering Jinja2 templates of a typical size and
+of several megabytes, rendered into memory and streamed.
+"""
+
+import itertools
+import os
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from bakerman.plugin.render import jinja2 as plugin
+from bakerman.plugin.render.jinja2 import Jinja2, getEnvironment
+
+# The number of variables and the number of lines of each template.
+TEMPLATES = {"small": (10, 40), "large": (100, 100000)}
+
+
+def writeTemplate(workdir: str, variables: int, lines: int) -> Dict[str, str]:
+    """
+    Writes a `bakerman.template` resembling a Dockerfile to `workdir`.  The
+    template variables are spread evenly over its lines.
+
+    Args:
+        workdir: The directory to write the template to.
+        variables: The number of template variables.
+        lines: The number of lines of the template.
+
+    Returns:
+        A value for each template variable.
+    """
+
+    with open(os.path.join(workdir, "bakerman.template"), "w") as f:
+        for index in range(lines):
+            if index % max(1, lines // variables) == 0:
+                f.write(
+                    "ARG VERSION_%s={{ var_%s }}\n"
+                    % (index % variables, index % variables)
+                )
+            else:
+                f.write(
+                    "RUN echo 'static line %s of the template' >> /etc/motd\n" % (index)
+                )
+    return {"var_%s" % (index): "1.0.%s" % (index) for index in range(variables)}
+
+
+@pytest.fixture
+def stream(request: Any) -> Iterator[bool]:
+
+    plugin.configure(stream=request.param)
+    yield request.param
+    plugin.configure(stream=False)
+
+
+@pytest.mark.parametrize("size", TEMPLATES)
+def bench_compile(benchmark: Any, tmp_path: Any, size: str) -> None:
+
+    writeTemplate(str(tmp_path), *TEMPLATES[size])
+    benchmark.pedantic(
+        lambda: getEnvironment(str(tmp_path)).get_template("bakerman.template"),
+        setup=plugin.configure,
+        rounds=5,
+    )
+
+
+@pytest.mark.parametrize("changed", [False, True], ids=["unchanged", "changed"])
+@pytest.mark.parametrize(
+    "stream", [False, True], ids=["memory", "stream"], indirect=True
+)
+@pytest.mark.parametrize("size", TEMPLATES)
+def bench_render(
+    benchmark: Any, tmp_path: Any, size: str, stream: bool, changed: bool
+) -> None:
+
+    variables = writeTemplate(str(tmp_path), *TEMPLATES[size])
+    renderer = Jinja2(str(tmp_path), "bakerman.template", "bakerman.target")
+    renderer.render(variables)
+
+    if changed:
+        # Alternate the values so the target is replaced each round.
+        values = itertools.cycle([variables, {name: "2.0.0" for name in variables}])
+        benchmark(lambda: renderer.render(next(values)))
+    else:
+        assert benchmark(renderer.render, variables) is False
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_version.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Benchmarks selecting the latest version out of a list of tags, both directly
+and through the Docker Hub lookup and the git repo plugin which feed it.
+"""
+
+import json
+import os
+import subprocess
+from typing import Any, Callable
+
+import pytest
+
+from conftest import Response, syntheticTags
+
+from bakerman.plugin.lookup import docker_hub
+from bakerman.plugin.lookup.docker_hub import DockerHub
+from bakerman.plugin.repo.git import Git
+from bakerman.version import latestVersion
+
+SIZES = [100, 1000, 10000, 50000]
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_latestVersion(benchmark: Any, count: int) -> None:
+
+    tags = syntheticTags(count)
+    assert benchmark(latestVersion, tags) is not None
+
+
+@pytest.mark.parametrize("count", SIZES)
+def bench_dockerHubLookup(
+    benchmark: Any, http: Callable[[str, Response], None], count: int
+) -> None:
+
+    tags = syntheticTags(count)
+    http(
+        docker_hub.AUTH_URL + "/token",
+        Response(json.dumps({"token": "secret", "expires_in": 300}).encode()),
+    )
+    # The registry returns the tags in pages linked using the `Link` header.
+    path = "/v2/library/bench/tags/list?n=%s" % (docker_hub.PAGE_SIZE)
+    for index in range(0, count, docker_hub.PAGE_SIZE):
+        url = path if index == 0 else "%s&last=%s" % (path, index)
+        following = "%s&last=%s" % (path, index + docker_hub.PAGE_SIZE)
+        http(
+            docker_hub.REGISTRY_URL + url,
+            Response(
+                json.dumps(
+                    {"tags": tags[index : index + docker_hub.PAGE_SIZE]}
+                ).encode(),
+                links=(
+                    {"next": {"url": following}}
+                    if index + docker_hub.PAGE_SIZE < count
+                    else {}
+                ),
+            ),
+        )
+
+    assert benchmark(DockerHub().lookup, "bench") == latestVersion(tags)
+
+
+@pytest.mark.parametrize("count", [100, 1000, 10000])
+def bench_gitLatestTag(benchmark: Any, tmp_path: Any, count: int) -> None:
+
+    workdir = str(tmp_path)
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="bench",
+        GIT_AUTHOR_EMAIL="bench@localhost",
+        GIT_COMMITTER_NAME="bench",
+        GIT_COMMITTER_EMAIL="bench@localhost",
+    )
+    subprocess.run(["git", "init", "-q", workdir], check=True)
+    subprocess.run(
+        ["git", "commit", "-q", "--allow-empty", "-m", "bench"],
+        cwd=workdir,
+        env=env,
+        check=True,
+    )
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=workdir,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+    # Writing packed-refs directly is a lot faster than running `git tag`.
+    tags = sorted(set(tag for tag in syntheticTags(count) if "/" not in tag))
+    with open(os.path.join(workdir, ".git", "packed-refs"), "w") as f:
+        f.write("# pack-refs with: peeled fully-peeled sorted \n")
+        for tag in tags:
+            f.write("%s refs/tags/%s\n" % (head, tag))
+
+    repo = Git(None, workdir)
+    assert benchmark(repo._Git__getLatestTag) == latestVersion(tags)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  conftest.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Shared fixtures of the benchmark suite.  The benchmarks never touch the
+network: `httpclient.get` is replaced by the `http` fixture which answers
+from recorded or synthetic responses and fails on any other URL.
+
+    $ pip install pytest-benchmark
+    $ pytest benchmarks
+"""
+
+import json
+import os
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+from bakerman import httpclient
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture(filename: str) -> bytes:
+    """
+    Returns the content of a file in `benchmarks/fixtures`.
+
+    Args:
+        filename: The name of the fixture file.
+    """
+
+    with open(os.path.join(FIXTURES, filename), "rb") as f:
+        return f.read()
+
+
+def syntheticTags(count: int, seed: int = 0) -> List[str]:
+    """
+    Returns `count` tags resembling those of a busy container image: mostly
+    semver versions mixed with prereleases, `v` prefixes, variants and
+    moving tags which aren't valid semver versions.
+
+    Args:
+        count: The number of tags to generate.
+        seed: The seed making the list reproducible.
+    """
+
+    generator = random.Random(seed)
+    tags = []
+    for _ in range(count):
+        version = "%s.%s.%s" % (
+            generator.randint(0, 30),
+            generator.randint(0, 50),
+            generator.randint(0, 100),
+        )
+        kind = generator.random()
+        if kind < 0.6:
+            tags.append(version)
+        elif kind < 0.7:
+            tags.append("%s-rc.%s" % (version, generator.randint(1, 5)))
+        elif kind < 0.8:
+            tags.append("v" + version)
+        elif kind < 0.9:
+            tags.append("%s-alpine3.%s" % (version, generator.randint(10, 20)))
+        else:
+            tags.append(generator.choice(["latest", "stable", "edge", "1.2"]))
+    return tags
+
+
+class Response:
+    """
+    A stand-in for `requests.Response` offering the attributes used by the
+    lookup plugins.
+
+    Args:
+        content: The response body.
+        status_code: The HTTP status code.
+        links: The parsed `Link` header.
+    """
+
+    def __init__(
+        self, content: bytes, status_code: int = 200, links: Optional[Dict] = None
+    ) -> None:
+        self.content = content
+        self.status_code = status_code
+        self.links = links or {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise Exception("HTTP status %s" % (self.status_code))
+
+
+@pytest.fixture
+def http(monkeypatch: Any) -> Callable[[str, Response], None]:
+    """
+    Replaces `httpclient.get` and returns a function registering the
+    response of a URL.  A request is answered by the registered URL which is
+    the longest prefix of the requested URL.
+    """
+
+    responses: Dict[str, Response] = {}
+
+    def get(url: str, **kwargs: Any) -> Response:
+        for prefix in sorted(responses, key=len, reverse=True):
+            if url.startswith(prefix):
+                return responses[prefix]
+        raise RuntimeError(
+            "Benchmarks run offline. No response recorded for %s" % (url)
+        )
+
+    def register(url: str, response: Response) -> None:
+        responses[url] = response
+
+    monkeypatch.setattr(httpclient, "get", get)
+    return register
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  importtime.py
+#
+#  Copyright 2018 Jelle Smet <development@smetj.net>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Measures the time it takes to import `bakerman` and to get through the CLI
+start up (`bakerman --help` and parsing the arguments and applying the
+settings of a run) using `python -X importtime`.  Fails when any of them
+exceeds `--max-ms` or imports one of the `--forbid` modules.
+
+    $ python benchmarks/importtime.py --max-ms 100
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Heavy dependencies which should only be imported on the code path using them.
+FORBIDDEN = ["requests", "jinja2", "bs4", "git", "semver", "sqlite3"]
+
+# The measured statements.  A run which turns out to have nothing to do only
+# gets through the start up before it stops.
+SCENARIOS = {
+    "import bakerman": "import bakerman",
+    "bakerman --help": (
+        "import bakerman\n"
+        "try:\n"
+        "    bakerman.parseArguments(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass"
+    ),
+    "bakerman configure": (
+        "import bakerman\n"
+        "bakerman.configure(bakerman.parseArguments("
+        "['--repo', 'https://localhost/repo.git', '--workdir', 'repo']))"
+    ),
+}
+
+
+def measure(statement: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Executes `statement` in a fresh interpreter with `-X importtime`.
+
+    Args:
+        statement: The Python statement to execute.
+
+    Returns:
+        A tuple containing the cumulative import time in microseconds of
+        `bakerman` and of all modules imported after it and the cumulative
+        import time of each of those modules.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+    )
+    # `-X importtime` lists the imports of a module before the module itself
+    # with the nesting level as indentation.  Everything listed after the
+    # previous top level import belongs to the top level module.  Everything
+    # listed after `bakerman` is imported while executing `statement`.
+    total = 0
+    group: Dict[str, int] = {}
+    found = False
+    for line in result.stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        group[name.strip()] = int(cumulative)
+        if not name.startswith("  "):
+            if name.strip() == "bakerman":
+                found = True
+            if found:
+                total += int(cumulative)
+            else:
+                group = {}
+    return (total, group) if found else (0, {})
+
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the import and CLI start up time of bakerman.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--runs", type=int, default=10, help="The number of measurements."
+    )
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Fail when the median import time of a scenario exceeds this number of milliseconds.",
+    )
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=FORBIDDEN,
+        help="Fail when any of these modules is imported by a scenario.",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Show the N slowest imported modules."
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+
+    args = parseArguments()
+
+    failed = False
+    for scenario, statement in SCENARIOS.items():
+        timings = []
+        modules: Dict[str, int] = {}
+        for _ in range(args.runs):
+            total, modules = measure(statement)
+            timings.append(total)
+
+        median = statistics.median(timings) / 1000
+        print(f"{scenario}: median {median:.1f} ms over {args.runs} runs")
+        for name, cumulative in sorted(modules.items(), key=lambda i: -i[1])[
+            : args.top
+        ]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+        imported = [name for name in args.forbid if name in modules]
+        if imported:
+            print(f"FAIL: '{scenario}' imports {', '.join(imported)}")
+            failed = True
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"FAIL: '{scenario}' median import time exceeds {args.max_ms} ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -72,7 +72,11 @@ setup(
         "Intended Audience :: Developers",
         "Intended Audience :: System Administrators",
     ],
-    extras_require={"testing": ["pytest"]},
+    extras_require={
+        "testing": ["pytest"],
+        "fast": ["orjson"],
+        "benchmark": ["pytest", "pytest-benchmark"],
+    },
     platforms=["Linux"],
     test_suite="tests.test_wishbone",
     cmdclass={"test": PyTest},